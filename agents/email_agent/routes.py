@@ -5,6 +5,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from models import db, EmailAgentConfig, ProcessedEmail, ActivityLog
 import asyncio
+from auth.routes import invalidate_config_status, invalidate_dashboard
 
 email_bp = Blueprint('email', __name__)
 
@@ -53,14 +54,10 @@ def dashboard():
         weekly_tasks.append(tasks_sum)
     
     # Get recent activity
-    recent_logs = ActivityLog.query.filter_by(
-        user_id=current_user.id, 
-        agent_type='email'
-    ).order_by(ActivityLog.created_at.desc()).limit(20).all()
+    recent_logs = ActivityLog.for_user(current_user.id, agent_type='email').limit(20).all()
     
     # Get recent emails
-    recent_emails = ProcessedEmail.query.filter_by(user_id=current_user.id)\
-        .order_by(ProcessedEmail.processed_at.desc()).limit(10).all()
+    recent_emails = ProcessedEmail.for_user(current_user.id).limit(10).all()
     
     # Check if configured
     is_configured = bool(
@@ -109,6 +106,7 @@ def config():
         cfg.is_enabled = 'is_enabled' in request.form
         
         db.session.commit()
+        invalidate_config_status(current_user.id)
         flash('Email agent configuration saved!', 'success')
         return redirect(url_for('email.config'))
     
@@ -149,6 +147,7 @@ def run():
         )
         db.session.add(log)
         db.session.commit()
+        invalidate_dashboard(current_user.id)
         
         if result['success']:
             flash(f"Email scan complete! Checked {result['emails_checked']} emails, created {result['tasks_created']} tasks.", 'success')
@@ -201,6 +200,7 @@ def run_ajax():
         )
         db.session.add(log)
         db.session.commit()
+        invalidate_dashboard(current_user.id)
         
         return jsonify(result)
         
@@ -215,8 +215,7 @@ def history():
     page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    emails = ProcessedEmail.query.filter_by(user_id=current_user.id)\
-        .order_by(ProcessedEmail.processed_at.desc())\
+    emails = ProcessedEmail.for_user(current_user.id)\
         .paginate(page=page, per_page=per_page, error_out=False)
     
     return render_template('email/history.html', emails=emails)
@@ -138,15 +138,14 @@ class EmailAgentService:
                     else:
                         self.logs.append("💤 No actions.")
                     
-                    # Log processed email
-                    processed = ProcessedEmail(
+                    # Log processed email (skipped if a concurrent scan already logged it)
+                    ProcessedEmail.insert_ignore(
                         user_id=self.user.id,
                         email_id=msg_id,
                         subject=subject[:500],
                         sender=s_email,
                         tasks_created=email_tasks_created
                     )
-                    db.session.add(processed)
                 
                 db.session.commit()
                 
@@ -5,6 +5,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from models import db, MeetingAgentConfig, ProcessedMeeting, ActivityLog
 import asyncio
+from auth.routes import invalidate_config_status, invalidate_dashboard
 
 meeting_bp = Blueprint('meeting', __name__)
 
@@ -52,14 +53,10 @@ def dashboard():
         weekly_tasks.append(tasks_sum)
     
     # Get recent activity
-    recent_logs = ActivityLog.query.filter_by(
-        user_id=current_user.id, 
-        agent_type='meeting'
-    ).order_by(ActivityLog.created_at.desc()).limit(20).all()
+    recent_logs = ActivityLog.for_user(current_user.id, agent_type='meeting').limit(20).all()
     
     # Get recent meetings
-    recent_meetings = ProcessedMeeting.query.filter_by(user_id=current_user.id)\
-        .order_by(ProcessedMeeting.processed_at.desc()).limit(10).all()
+    recent_meetings = ProcessedMeeting.for_user(current_user.id).limit(10).all()
     
     # Check if configured
     is_configured = bool(
@@ -91,8 +88,15 @@ def config():
     if request.method == 'POST':
         # Update configuration
         cfg.clickup_list_id = request.form.get('clickup_list_id', '').strip()
-        cfg.target_space_id = request.form.get('target_space_id', '').strip()
-        cfg.target_doc_name = request.form.get('target_doc_name', '').strip() or 'Daily Standup Summary By AI'
+        target_space_id = request.form.get('target_space_id', '').strip()
+        target_doc_name = request.form.get('target_doc_name', '').strip() or 'Daily Standup Summary By AI'
+        if (target_space_id, target_doc_name) != (cfg.target_space_id, cfg.target_doc_name):
+            # Summary doc changed - drop cached ClickUp IDs
+            cfg.cached_workspace_id = None
+            cfg.cached_doc_id = None
+            cfg.cached_page_id = None
+        cfg.target_space_id = target_space_id
+        cfg.target_doc_name = target_doc_name
         cfg.helpdesk_email = request.form.get('helpdesk_email', '').strip()
         cfg.scan_days_back = int(request.form.get('scan_days_back', 2))
         
@@ -110,6 +114,7 @@ def config():
         cfg.is_enabled = 'is_enabled' in request.form
         
         db.session.commit()
+        invalidate_config_status(current_user.id)
         flash('Meeting agent configuration saved!', 'success')
         return redirect(url_for('meeting.config'))
     
@@ -150,6 +155,7 @@ def run():
         )
         db.session.add(log)
         db.session.commit()
+        invalidate_dashboard(current_user.id)
         
         if result['success']:
             flash(f"Meeting scan complete! Checked {result['meetings_checked']} meetings, created {result['tasks_created']} tasks.", 'success')
@@ -220,8 +226,7 @@ def history():
     page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    meetings = ProcessedMeeting.query.filter_by(user_id=current_user.id)\
-        .order_by(ProcessedMeeting.processed_at.desc())\
+    meetings = ProcessedMeeting.for_user(current_user.id)\
         .paginate(page=page, per_page=per_page, error_out=False)
     
     return render_template('meeting/history.html', meetings=meetings)
@@ -4,17 +4,132 @@ Processes Teams meeting transcripts and creates ClickUp tasks
 """
 import os
 import re
-import json
-import requests
+import time
+import asyncio
+import functools
+import orjson
 from datetime import datetime, timedelta, timezone
 from openai import OpenAI
 from models import db, ProcessedMeeting
+from utils.rate_limit import limited_request, get_limiter
 
 # API Endpoints
 GRAPH_API = "https://graph.microsoft.com/v1.0"
 CLICKUP_API = "https://api.clickup.com/api/v2"
 CLICKUP_API_V3 = "https://api.clickup.com/api/v3"
 
+# LLM input limits for transcripts (tokens). Longer transcripts are split
+# into overlapping windows for task extraction.
+TRANSCRIPT_TOKEN_BUDGET = 8000
+TRANSCRIPT_WINDOW_TOKENS = 6000
+TRANSCRIPT_WINDOW_OVERLAP = 500
+# Rough chars-per-token ratio used when tiktoken is unavailable
+_CHARS_PER_TOKEN = 4
+
+# Soft wall-clock budget for one scan (Celery hard-kills tasks at 600s)
+SCAN_TIME_BUDGET_SECONDS = 300
+
+# Teams join URL patterns (most specific first)
+_TEAMS_URL_PATTERNS = (
+    re.compile(r"https://teams\.microsoft\.com/l/meetup-join/[^\s\"<>]+"),
+    re.compile(r"https://teams\.microsoft\.com/[^\s\"<>]+"),
+)
+_TEAMS_HREF_RE = re.compile(r'href=[\'"](https://teams\.microsoft\.com/l/meetup-join/[^\'"]+)[\'"]')
+_TEAMS_HOST = "teams.microsoft.com"
+# Graph caps bodyPreview at 255 chars; bound the scan defensively anyway
+_MAX_URL_SCAN_CHARS = 4096
+
+
+def _loads(resp):
+    """Decode a JSON HTTP response (or raw JSON str/bytes) with orjson."""
+    return orjson.loads(resp.content if hasattr(resp, 'content') else resp)
+
+
+def _compile_keyword_pattern(keywords):
+    """Compile keywords into one case-insensitive substring regex (None if empty)."""
+    keywords = [k.lower() for k in (keywords or []) if k]
+    if not keywords:
+        return None
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding for gpt-4o-mini, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        return None
+
+
+def _truncate_to_tokens(text, max_tokens=TRANSCRIPT_TOKEN_BUDGET):
+    """Cut text to at most max_tokens tokens."""
+    enc = _get_encoding()
+    if enc is None:
+        return text[:max_tokens * _CHARS_PER_TOKEN]
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+def _split_transcript(text):
+    """
+    Return [text] if it fits TRANSCRIPT_TOKEN_BUDGET, otherwise overlapping
+    windows of TRANSCRIPT_WINDOW_TOKENS tokens.
+    """
+    step = TRANSCRIPT_WINDOW_TOKENS - TRANSCRIPT_WINDOW_OVERLAP
+    enc = _get_encoding()
+    if enc is None:
+        window = TRANSCRIPT_WINDOW_TOKENS * _CHARS_PER_TOKEN
+        if len(text) <= TRANSCRIPT_TOKEN_BUDGET * _CHARS_PER_TOKEN:
+            return [text]
+        step *= _CHARS_PER_TOKEN
+        return [text[i:i + window] for i in range(0, len(text) - (window - step), step)]
+    
+    tokens = enc.encode(text)
+    if len(tokens) <= TRANSCRIPT_TOKEN_BUDGET:
+        return [text]
+    return [
+        enc.decode(tokens[i:i + TRANSCRIPT_WINDOW_TOKENS])
+        for i in range(0, len(tokens) - TRANSCRIPT_WINDOW_OVERLAP, step)
+    ]
+
+
+@functools.lru_cache(maxsize=32)
+def _shared_openai_client(api_key):
+    """One OpenAI client (and connection pool) per API key per process."""
+    return OpenAI(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=512)
+def _llm_is_duplicate(api_key, new_title, existing_titles):
+    """
+    Ask the LLM whether new_title duplicates any of existing_titles.
+    Memoized so repeated/templated task names skip the round trip; errors
+    propagate (and are therefore not cached).
+    """
+    existing_str = "\n".join([f"{i+1}. {name}" for i, name in enumerate(existing_titles)])
+    
+    prompt = (
+        "Strict task deduplication.\n"
+        f"New Task: '{new_title}'\n"
+        f"Existing Tasks:\n{existing_str}\n\n"
+        "Is the New Task semantically identical to any Existing Task?\n"
+        "JSON: {\"is_duplicate\": true/false}"
+    )
+    
+    with get_limiter("api.openai.com"):
+        resp = _shared_openai_client(api_key).chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+            response_format={"type": "json_object"}
+        )
+    result = orjson.loads(resp.choices[0].message.content)
+    return result.get("is_duplicate", False)
+
 
 class MeetingAgentService:
     """Service for processing meetings and creating ClickUp tasks."""
@@ -30,17 +145,34 @@ class MeetingAgentService:
         self.openai_api_key = self.settings.openai_api_key or os.getenv('OPENAI_API_KEY')
         self.ms_access_token = self.settings.ms_access_token
         
+        # OpenAI client (shares one HTTP connection pool across LLM calls)
+        self._openai_client = None
+        
         # Cache for ClickUp data
         self.clickup_users = {}
         self.clickup_tasks = []
+        
+        # Subject matchers, compiled once per run (the voice bot scheduler
+        # reuses this service for users without a meeting config)
+        self._standup_re = None
+        self._excluded_re = None
+        if self.config:
+            self._standup_re = _compile_keyword_pattern(self.config.standup_meeting_keywords)
+            self._excluded_re = _compile_keyword_pattern(self.config.excluded_meeting_names)
     
-    async def process_meetings(self):
-        """Main entry point for meeting processing."""
-        # Run synchronously since Graph API calls are sync
-        return self._process_meetings_sync()
+    def _get_openai_client(self):
+        """Return the OpenAI client for this service, built once on first use."""
+        if self._openai_client is None and self.openai_api_key:
+            self._openai_client = _shared_openai_client(self.openai_api_key)
+        return self._openai_client
     
-    def _process_meetings_sync(self):
-        """Synchronous meeting processing."""
+    async def process_meetings(self, time_budget=SCAN_TIME_BUDGET_SECONDS):
+        """
+        Main entry point for meeting processing.
+        Newest meetings are processed first; once `time_budget` seconds have
+        elapsed no further meetings are started (the rest are picked up next run).
+        """
+        deadline = time.monotonic() + time_budget
         result = {
             'success': False,
             'meetings_checked': 0,
@@ -108,31 +240,39 @@ class MeetingAgentService:
             result['meetings_checked'] = len(unique_meetings)
             self.logs.append(f"🔍 Unique Meetings Found: {len(unique_meetings)}")
             
-            # Load processed transcripts
-            processed_ids = set(
-                m.transcript_id for m in ProcessedMeeting.query.filter_by(user_id=self.user.id).all()
-            )
+            # Load processed transcript IDs (scalar query, served by the
+            # unique_user_transcript index - no ORM rows are built)
+            processed_ids = {
+                row[0] for row in db.session.query(ProcessedMeeting.transcript_id)
+                .filter_by(user_id=self.user.id)
+            }
             
             tasks_created = 0
             summaries_created = 0
             processed_mids = set()
             
-            # Get excluded meeting names
-            excluded_names = [n.lower() for n in (self.config.excluded_meeting_names or [])]
+            # Newest first; chat meetings without a start time go last
+            ordered_meetings = sorted(
+                unique_meetings.values(),
+                key=lambda x: x.get("start_time") or "",
+                reverse=True
+            )
             
-            for item in unique_meetings.values():
+            for item in ordered_meetings:
+                if time.monotonic() > deadline:
+                    self.logs.append(f"⏱️ Time budget ({time_budget}s) reached, deferring remaining meetings to next run")
+                    break
+                
                 subject = item["subject"]
                 
                 # Check if meeting should be excluded
-                if excluded_names:
-                    should_exclude = any(excl in subject.lower() for excl in excluded_names)
-                    if should_exclude:
-                        self.logs.append(f"⏭️ Skipping excluded meeting: {subject[:40]}")
-                        continue
+                if self._excluded_re and self._excluded_re.search(subject.lower()):
+                    self.logs.append(f"⏭️ Skipping excluded meeting: {subject[:40]}")
+                    continue
                 
                 mid = self._get_meeting_id_by_join_url(headers, item["joinUrl"])
                 if mid and mid not in processed_mids:
-                    tc, sc = self._process_single_meeting(
+                    tc, sc = await self._process_single_meeting(
                         headers, mid, subject, processed_ids,
                         item.get("start_time"), item.get("end_time")
                     )
@@ -160,9 +300,9 @@ class MeetingAgentService:
         
         headers = {"Authorization": self.clickup_api_key}
         try:
-            resp = requests.get(f"{CLICKUP_API}/team", headers=headers)
+            resp = limited_request("GET", f"{CLICKUP_API}/team", headers=headers)
             if resp.status_code == 200:
-                teams = resp.json().get('teams', [])
+                teams = _loads(resp).get('teams', [])
                 if teams:
                     for m in teams[0].get('members', []):
                         user = m.get('user', {})
@@ -185,12 +325,13 @@ class MeetingAgentService:
         params = {"archived": "false", "subtasks": "true"}
         
         try:
-            resp = requests.get(
+            resp = limited_request(
+                "GET",
                 f"{CLICKUP_API}/list/{self.config.clickup_list_id}/task",
                 headers=headers, params=params
             )
             if resp.status_code == 200:
-                for t in resp.json().get('tasks', []):
+                for t in _loads(resp).get('tasks', []):
                     self.clickup_tasks.append({
                         'name': t['name'],
                         'description': (t.get('description') or "")[:300]
@@ -204,10 +345,10 @@ class MeetingAgentService:
         events = []
         
         while True:
-            resp = requests.get(url, headers=headers)
+            resp = limited_request("GET", url, headers=headers)
             if resp.status_code != 200:
                 return events
-            data = resp.json()
+            data = _loads(resp)
             events.extend(data.get("value", []))
             if not data.get("@odata.nextLink"):
                 break
@@ -217,11 +358,11 @@ class MeetingAgentService:
     
     def _get_recent_chats(self, headers, start_iso):
         """Get recent chats with meetings."""
-        url = f"{GRAPH_API}/me/chats?$top=20"
+        url = f"{GRAPH_API}/me/chats?$top=50&$select=id,topic,lastUpdatedDateTime,onlineMeetingInfo"
         chats = []
         
         try:
-            resp = requests.get(url, headers=headers)
+            resp = limited_request("GET", url, headers=headers)
             if resp.status_code != 200:
                 return []
             
@@ -230,7 +371,7 @@ class MeetingAgentService:
             except:
                 start_dt = datetime.now(timezone.utc) - timedelta(days=2)
             
-            for chat in resp.json().get("value", []):
+            for chat in _loads(resp).get("value", []):
                 updated_at_str = chat.get("lastUpdatedDateTime")
                 if updated_at_str:
                     try:
@@ -255,37 +396,33 @@ class MeetingAgentService:
     
     def _extract_join_url(self, ev):
         """Extract Teams join URL from event."""
-        # 1. Standard Properties
+        # 1. Standard Properties (populated for nearly every online meeting)
         jm = ev.get("onlineMeeting") or {}
         if isinstance(jm, dict) and jm.get("joinUrl"):
             return jm.get("joinUrl")
         url = ev.get("onlineMeetingUrl")
         if url:
             return url
-            
-        # 2. Regex Search patterns
-        patterns = [
-            r"https://teams\.microsoft\.com/l/meetup-join/[^\s\"<>]+",
-            r"https://teams\.microsoft\.com/[^\s\"<>]+"
-        ]
         
-        # 3. Search Body Preview
+        # 2. Search Body Preview
         bp = ev.get("bodyPreview") or ""
-        for p in patterns:
-            m = re.search(p, bp)
-            if m: return m.group(0)
+        if _TEAMS_HOST in bp:
+            for p in _TEAMS_URL_PATTERNS:
+                m = p.search(bp, 0, _MAX_URL_SCAN_CHARS)
+                if m: return m.group(0)
             
-        # 4. Search Full Body (HTML)
+        # 3. Search Full Body (HTML)
         body = ev.get("body") or {}
         content = body.get("content") or ""
-        if content:
+        # Every pattern needs the Teams host; skip regex work on bodies without it
+        if _TEAMS_HOST in content:
             # Check hrefs first
-            m_href = re.search(r'href=[\'"](https://teams\.microsoft\.com/l/meetup-join/[^\'"]+)[\'"]', content)
+            m_href = _TEAMS_HREF_RE.search(content)
             if m_href: return m_href.group(1)
             
             # Check plain text in body
-            for p in patterns:
-                m = re.search(p, content)
+            for p in _TEAMS_URL_PATTERNS:
+                m = p.search(content)
                 if m: return m.group(0)
                 
         return None
@@ -298,16 +435,16 @@ class MeetingAgentService:
         url = f"{GRAPH_API}/me/onlineMeetings?$filter=JoinWebUrl%20eq%20'{encoded}'"
         
         try:
-            resp = requests.get(url, headers=headers)
+            resp = limited_request("GET", url, headers=headers)
             if resp.status_code == 200:
-                items = resp.json().get("value", [])
+                items = _loads(resp).get("value", [])
                 if items:
                     return items[0]["id"]
         except:
             pass
         return None
     
-    def _process_single_meeting(self, headers, meeting_id, subject, processed_ids, start_time, end_time):
+    async def _process_single_meeting(self, headers, meeting_id, subject, processed_ids, start_time, end_time):
         """Process a single meeting's transcripts."""
         tasks_created = 0
         summaries_created = 0
@@ -317,64 +454,108 @@ class MeetingAgentService:
         if not transcripts:
             return 0, 0
         
-        for t_meta in transcripts:
-            transcript_id = t_meta['id']
-            transcript_date = t_meta.get('createdDateTime', '')
-            
-            if transcript_id in processed_ids:
-                continue
-            
-            self.logs.append(f"🆕 Found NEW transcript for '{subject[:30]}' (Date: {transcript_date})")
-            
-            # Download transcript
-            transcript_text = self._download_transcript(headers, meeting_id, transcript_id)
-            if not transcript_text:
-                self.logs.append(f"❌ Failed to download transcript {transcript_id}")
+        # Check if standup meeting
+        is_standup = bool(self._standup_re and self._standup_re.search(subject.lower()))
+        
+        new_transcripts = [t for t in transcripts if t['id'] not in processed_ids]
+        for t_meta in new_transcripts:
+            self.logs.append(f"🆕 Found NEW transcript for '{subject[:30]}' (Date: {t_meta.get('createdDateTime', '')})")
+        
+        # Download + LLM extraction overlap across transcripts; ClickUp writes
+        # and DB inserts below stay sequential on this thread
+        results = await asyncio.gather(*[
+            self._analyze_transcript(headers, meeting_id, t_meta, is_standup)
+            for t_meta in new_transcripts
+        ])
+        
+        for t_meta, analysis in zip(new_transcripts, results):
+            if analysis is None:
                 continue
+            tasks, summary = analysis
             
-            self.logs.append(f"✓ Transcript downloaded ({len(transcript_text)} chars)")
-            
-            # Check if standup meeting
-            is_standup = any(
-                kw.lower() in subject.lower() 
-                for kw in self.config.standup_meeting_keywords
-            )
-            
-            if is_standup:
-                self.logs.append(f"📋 Generating standup summary...")
-                summary = self._extract_standup_summary(transcript_text, transcript_date)
-                if summary:
-                    if self._write_summary_to_clickup(summary):
-                        summaries_created += 1
-                        self.logs.append("✅ Standup summary written to ClickUp.")
+            summary_written = False
+            if summary and self._write_summary_to_clickup(summary):
+                summary_written = True
+                summaries_created += 1
+                self.logs.append("✅ Standup summary written to ClickUp.")
             
-            # Extract and create tasks
-            tasks = self._extract_tasks(transcript_text)
+            # Create tasks
             if tasks:
                 self.logs.append(f"🚀 Found {len(tasks)} tasks")
                 for task in tasks:
                     if self._create_clickup_task(task, subject, headers, start_time, end_time):
                         tasks_created += 1
             
-            # Log processed meeting
-            processed = ProcessedMeeting(
+            # Log processed meeting (skipped if a concurrent scan already logged it)
+            ProcessedMeeting.insert_ignore(
                 user_id=self.user.id,
-                transcript_id=transcript_id,
+                transcript_id=t_meta['id'],
                 meeting_subject=subject[:500],
                 tasks_created=len(tasks) if tasks else 0,
-                standup_summary_created=is_standup and summaries_created > 0
+                standup_summary_created=summary_written
             )
-            db.session.add(processed)
         
         return tasks_created, summaries_created
     
+    async def _analyze_transcript(self, headers, meeting_id, t_meta, is_standup):
+        """
+        Download a transcript and run task/standup extraction concurrently.
+        Returns (tasks, summary), or None if the download failed.
+        """
+        transcript_id = t_meta['id']
+        transcript_text = await asyncio.to_thread(
+            self._download_transcript, headers, meeting_id, transcript_id
+        )
+        if not transcript_text:
+            self.logs.append(f"❌ Failed to download transcript {transcript_id}")
+            return None
+        
+        self.logs.append(f"✓ Transcript downloaded ({len(transcript_text)} chars)")
+        
+        extract_tasks = self._extract_tasks_windowed(transcript_text)
+        if not is_standup:
+            return await extract_tasks, None
+        
+        self.logs.append(f"📋 Generating standup summary...")
+        tasks, summary = await asyncio.gather(
+            extract_tasks,
+            asyncio.to_thread(self._extract_standup_summary, transcript_text, t_meta.get('createdDateTime', ''))
+        )
+        return tasks, summary
+    
+    async def _extract_tasks_windowed(self, text):
+        """
+        Extract tasks from a transcript, splitting long transcripts into
+        overlapping token windows that are sent to the LLM concurrently.
+        Tasks are merged and de-duplicated by title.
+        """
+        windows = _split_transcript(text)
+        if len(windows) == 1:
+            return await asyncio.to_thread(self._extract_tasks, windows[0])
+        
+        self.logs.append(f"✂️ Long transcript split into {len(windows)} windows")
+        results = await asyncio.gather(*[
+            asyncio.to_thread(self._extract_tasks, window) for window in windows
+        ])
+        
+        tasks = []
+        seen_titles = set()
+        for window_tasks in results:
+            for task in window_tasks:
+                title = (task.get("title") or "").strip().lower()
+                if title in seen_titles:
+                    continue
+                seen_titles.add(title)
+                tasks.append(task)
+        return tasks
+    
     def _get_transcripts_metadata(self, headers, meeting_id):
         """Get list of transcripts for a meeting."""
-        url = f"{GRAPH_API}/me/onlineMeetings/{meeting_id}/transcripts"
+        url = f"{GRAPH_API}/me/onlineMeetings/{meeting_id}/transcripts?$select=id,createdDateTime"
         try:
-            resp = requests.get(url, headers=headers)
+            resp = limited_request("GET", url, headers=headers)
             if resp.status_code == 200:
-                transcripts = resp.json().get("value", [])
+                transcripts = _loads(resp).get("value", [])
                 transcripts.sort(key=lambda x: x.get('createdDateTime', ''), reverse=True)
                 return transcripts
         except:
@@ -385,7 +566,7 @@ class MeetingAgentService:
         """Download transcript content."""
         url = f"{GRAPH_API}/me/onlineMeetings/{meeting_id}/transcripts/{transcript_id}/content?$format=text/vtt"
         try:
-            resp = requests.get(url, headers=headers)
+            resp = limited_request("GET", url, headers=headers)
             if resp.status_code == 200:
                 return self._vtt_to_text(resp.text)
         except:
@@ -411,7 +592,7 @@ class MeetingAgentService:
         if not self.openai_api_key:
             return []
         
-        client = OpenAI(api_key=self.openai_api_key)
+        client = self._get_openai_client()
         today_str = datetime.now().strftime("%Y-%m-%d")
         
         system_prompt = (
@@ -432,16 +613,17 @@ class MeetingAgentService:
         )
         
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Transcript:\n{text[:25000]}"}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
-            result = json.loads(resp.choices[0].message.content)
+            with get_limiter("api.openai.com"):
+                resp = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": f"Transcript:\n{_truncate_to_tokens(text)}"}
+                    ],
+                    temperature=0.3,
+                    response_format={"type": "json_object"}
+                )
+            result = orjson.loads(resp.choices[0].message.content)
             return result.get("tasks", [])
         except Exception as e:
             self.logs.append(f"❌ AI Error: {e}")
@@ -452,7 +634,7 @@ class MeetingAgentService:
         if not self.openai_api_key:
             return None
         
-        client = OpenAI(api_key=self.openai_api_key)
+        client = self._get_openai_client()
         
         if not meeting_date:
             meeting_date = datetime.now().strftime("%Y-%m-%d")
@@ -472,19 +654,100 @@ class MeetingAgentService:
         )
         
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Transcript:\n{text[:25000]}"}
-                ],
-                temperature=0.3
-            )
+            with get_limiter("api.openai.com"):
+                resp = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": f"Transcript:\n{_truncate_to_tokens(text)}"}
+                    ],
+                    temperature=0.3
+                )
             return resp.choices[0].message.content
         except Exception as e:
             self.logs.append(f"❌ AI Error: {e}")
             return None
     
+    def _resolve_summary_page(self, headers):
+        """
+        Resolve (workspace_id, doc_id, page_id) for the standup summary doc.
+        IDs are cached on the meeting config after the first lookup.
+        """
+        cfg = self.config
+        if cfg.cached_workspace_id and cfg.cached_doc_id and cfg.cached_page_id:
+            self.logs.append(f"✓ Using cached ClickUp doc page: {cfg.cached_page_id}")
+            return cfg.cached_workspace_id, cfg.cached_doc_id, cfg.cached_page_id
+        
+        # Get workspace ID
+        resp = limited_request("GET", f"{CLICKUP_API}/team", headers=headers)
+        if resp.status_code != 200:
+            self.logs.append(f"❌ Failed to get workspace: {resp.status_code}")
+            return None
+        
+        teams = _loads(resp).get("teams", [])
+        if not teams:
+            self.logs.append("❌ No workspaces found")
+            return None
+        
+        workspace_id = teams[0]["id"]
+        self.logs.append(f"✓ Workspace ID: {workspace_id}")
+        
+        # Search for docs in space
+        docs_url = f"{CLICKUP_API_V3}/workspaces/{workspace_id}/docs"
+        params = {"parent_id": cfg.target_space_id, "parent_type": 4}
+        
+        self.logs.append(f"📂 Searching docs in space {cfg.target_space_id}...")
+        resp = limited_request("GET", docs_url, headers=headers, params=params)
+        if resp.status_code != 200:
+            self.logs.append(f"❌ Failed to list docs: {resp.status_code} - {resp.text[:200]}")
+            return None
+        
+        docs = _loads(resp).get("docs", [])
+        self.logs.append(f"✓ Found {len(docs)} docs in space")
+        
+        # Find target doc
+        target_doc = None
+        for doc in docs:
+            doc_name = doc.get("name", "")
+            self.logs.append(f"   - Doc: '{doc_name}'")
+            if doc_name.lower() == cfg.target_doc_name.lower():
+                target_doc = doc
+                break
+        
+        if not target_doc:
+            self.logs.append(f"❌ Doc '{cfg.target_doc_name}' not found in space")
+            return None
+        
+        doc_id = target_doc['id']
+        self.logs.append(f"✓ Found target doc: ID={doc_id}")
+        
+        # Get page ID
+        pages_url = f"{CLICKUP_API_V3}/workspaces/{workspace_id}/docs/{doc_id}/pages"
+        resp = limited_request("GET", pages_url, headers=headers)
+        if resp.status_code != 200:
+            self.logs.append(f"❌ Failed to get pages: {resp.status_code}")
+            return None
+        
+        pages_data = _loads(resp)
+        pages = pages_data if isinstance(pages_data, list) else pages_data.get('pages', [])
+        if not pages:
+            self.logs.append("❌ Doc has no pages")
+            return None
+        
+        page_id = pages[0].get('id')
+        self.logs.append(f"✓ First page ID: {page_id}")
+        
+        cfg.cached_workspace_id = str(workspace_id)
+        cfg.cached_doc_id = str(doc_id)
+        cfg.cached_page_id = str(page_id)
+        return cfg.cached_workspace_id, cfg.cached_doc_id, cfg.cached_page_id
+    
+    def _clear_summary_page_cache(self):
+        """Forget cached ClickUp doc/page IDs so they are re-resolved."""
+        self.config.cached_workspace_id = None
+        self.config.cached_doc_id = None
+        self.config.cached_page_id = None
+    
     def _write_summary_to_clickup(self, summary_text):
         """Write standup summary to ClickUp doc."""
         if not self.config.target_space_id or not self.config.target_doc_name:
@@ -497,82 +760,37 @@ class MeetingAgentService:
             "Authorization": self.clickup_api_key,
             "Content-Type": "application/json"
         }
+        payload = {
+            "content": f"\n\n---\n\n{summary_text}",
+            "content_edit_mode": "append",
+            "content_format": "text/md"
+        }
         
         try:
-            # Get workspace ID
-            resp = requests.get(f"{CLICKUP_API}/team", headers=headers)
-            if resp.status_code != 200:
-                self.logs.append(f"❌ Failed to get workspace: {resp.status_code}")
-                return False
-            
-            teams = resp.json().get("teams", [])
-            if not teams:
-                self.logs.append("❌ No workspaces found")
-                return False
-            
-            workspace_id = teams[0]["id"]
-            self.logs.append(f"✓ Workspace ID: {workspace_id}")
-            
-            # Search for docs in space
-            docs_url = f"{CLICKUP_API_V3}/workspaces/{workspace_id}/docs"
-            params = {"parent_id": self.config.target_space_id, "parent_type": 4}
-            
-            self.logs.append(f"📂 Searching docs in space {self.config.target_space_id}...")
-            resp = requests.get(docs_url, headers=headers, params=params)
-            if resp.status_code != 200:
-                self.logs.append(f"❌ Failed to list docs: {resp.status_code} - {resp.text[:200]}")
-                return False
-            
-            docs = resp.json().get("docs", [])
-            self.logs.append(f"✓ Found {len(docs)} docs in space")
-            
-            # Find target doc
-            target_doc = None
-            for doc in docs:
-                doc_name = doc.get("name", "")
-                self.logs.append(f"   - Doc: '{doc_name}'")
-                if doc_name.lower() == self.config.target_doc_name.lower():
-                    target_doc = doc
-                    break
-            
-            if not target_doc:
-                self.logs.append(f"❌ Doc '{self.config.target_doc_name}' not found in space")
-                return False
-            
-            doc_id = target_doc['id']
-            self.logs.append(f"✓ Found target doc: ID={doc_id}")
-            
-            # Get page ID
-            pages_url = f"{CLICKUP_API_V3}/workspaces/{workspace_id}/docs/{doc_id}/pages"
-            resp = requests.get(pages_url, headers=headers)
-            if resp.status_code != 200:
-                self.logs.append(f"❌ Failed to get pages: {resp.status_code}")
-                return False
-            
-            pages_data = resp.json()
-            pages = pages_data if isinstance(pages_data, list) else pages_data.get('pages', [])
-            if not pages:
-                self.logs.append("❌ Doc has no pages")
-                return False
-            
-            page_id = pages[0].get('id')
-            self.logs.append(f"✓ First page ID: {page_id}")
-            
-            # Update page content
-            update_url = f"{CLICKUP_API_V3}/workspaces/{workspace_id}/docs/{doc_id}/pages/{page_id}"
-            payload = {
-                "content": f"\n\n---\n\n{summary_text}",
-                "content_edit_mode": "append",
-                "content_format": "text/md"
-            }
-            
-            self.logs.append(f"📤 Appending summary to page...")
-            resp = requests.put(update_url, headers=headers, json=payload)
-            
-            if resp.status_code in [200, 204]:
-                self.logs.append("✅ Summary successfully written to ClickUp Doc!")
-                return True
-            else:
+            for attempt in range(2):
+                was_cached = bool(self.config.cached_page_id)
+                ids = self._resolve_summary_page(headers)
+                if not ids:
+                    return False
+                workspace_id, doc_id, page_id = ids
+                
+                # Update page content. "append" mode concatenates server-side,
+                # so there is no read-modify-write to race on and no If-Match
+                # is needed; at most one retry happens (stale cached page).
+                update_url = f"{CLICKUP_API_V3}/workspaces/{workspace_id}/docs/{doc_id}/pages/{page_id}"
+                self.logs.append(f"📤 Appending summary to page...")
+                resp = limited_request("PUT", update_url, headers=headers, json=payload)
+                
+                if resp.status_code in [200, 204]:
+                    self.logs.append("✅ Summary successfully written to ClickUp Doc!")
+                    return True
+                
+                if resp.status_code == 404 and was_cached and attempt == 0:
+                    # Cached page is gone (doc moved/deleted) - re-resolve once
+                    self.logs.append("⚠️ Cached ClickUp doc page not found, re-resolving...")
+                    self._clear_summary_page_cache()
+                    continue
+                
                 self.logs.append(f"❌ Failed to update doc: {resp.status_code} - {resp.text[:300]}")
                 return False
             
@@ -630,7 +848,8 @@ class MeetingAgentService:
         
         try:
             headers = {"Authorization": self.clickup_api_key, "Content-Type": "application/json"}
-            resp = requests.post(
+            resp = limited_request(
+                "POST",
                 f"{CLICKUP_API}/list/{self.config.clickup_list_id}/task",
                 headers=headers,
                 json=payload
@@ -656,25 +875,8 @@ class MeetingAgentService:
             if t['name'].lower() == new_title.lower():
                 return True
         
-        client = OpenAI(api_key=self.openai_api_key)
-        existing_str = "\n".join([f"{i+1}. {t['name']}" for i, t in enumerate(self.clickup_tasks[:30])])
-        
-        prompt = (
-            "Strict task deduplication.\n"
-            f"New Task: '{new_title}'\n"
-            f"Existing Tasks:\n{existing_str}\n\n"
-            "Is the New Task semantically identical to any Existing Task?\n"
-            "JSON: {\"is_duplicate\": true/false}"
-        )
-        
+        existing_titles = tuple(t['name'] for t in self.clickup_tasks[:30])
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.0,
-                response_format={"type": "json_object"}
-            )
-            result = json.loads(resp.choices[0].message.content)
-            return result.get("is_duplicate", False)
+            return _llm_is_duplicate(self.openai_api_key, new_title.lower(), existing_titles)
         except:
             return False
@@ -3,14 +3,77 @@ Recall.ai API Helper
 Manages creation and monitoring of Recall.ai bots for Teams meetings.
 """
 import os
+import time
+import atexit
+import asyncio
+import threading
 import httpx
+import orjson
 from typing import Optional, Dict, Any
 
 RECALL_API_BASE = "https://us-west-2.recall.ai/api/v1"
 
+# HTTP/2 multiplexes concurrent Recall calls over one connection (needs httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
 # Module-level token storage (set by routes when needed)
 _current_token: Optional[str] = None
 
+# Constant part of the create_bot payload; only read, never mutated per call
+_BOT_VARIANT = {
+    "zoom": "web_4_core",
+    "google_meet": "web_4_core",
+    "microsoft_teams": "web_4_core"
+}
+
+# Short-lived list_bots cache: (token, limit) -> (monotonic time, result).
+# Dropped for a token whenever that token creates or deletes a bot.
+LIST_CACHE_TTL = 15
+_list_cache: Dict[tuple, tuple] = {}
+
+
+def _invalidate_list_cache(api_token: str):
+    for key in [k for k in _list_cache if k[0] == api_token]:
+        _list_cache.pop(key, None)
+
+
+# Shared HTTP client (keeps the TLS connection pool to Recall alive between calls)
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Get the shared Recall.ai HTTP client, creating it on first use.
+    httpx clients are bound to an event loop, so a new one is built if
+    called from a different loop than the cached client's.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=RECALL_API_BASE,
+            http2=HTTP2_ENABLED,
+            timeout=30.0,
+            headers={"accept": "application/json"},
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+        )
+        _client_loop = loop
+    return _client
+
+
+async def aclose_client():
+    """Close the shared Recall.ai HTTP client."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
 
 def set_recall_token(token: str):
     """Set the Recall.ai token for API calls."""
@@ -47,11 +110,7 @@ async def create_bot(
     if not api_token:
         return {"error": "RECALL_AI_TOKEN not configured"}
     
-    headers = {
-        "Authorization": f"Token {api_token}",
-        "accept": "application/json",
-        "content-type": "application/json"
-    }
+    headers = {"Authorization": f"Token {api_token}"}
     
     # Build the client URL with websocket parameter
     if client_webpage_url and websocket_url:
@@ -70,29 +129,26 @@ async def create_bot(
                 }
             }
         },
-        "variant": {
-            "zoom": "web_4_core",
-            "google_meet": "web_4_core",
-            "microsoft_teams": "web_4_core"
-        }
+        "variant": _BOT_VARIANT
     }
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{RECALL_API_BASE}/bot/",
-                headers=headers,
-                json=body
-            )
-            
-            if response.status_code in [200, 201]:
-                return {"success": True, "bot": response.json()}
-            else:
-                return {
-                    "success": False,
-                    "error": f"API error: {response.status_code}",
-                    "details": response.text
-                }
+        client = _get_client()
+        response = await client.post(
+            "/bot/",
+            headers={**headers, "content-type": "application/json"},
+            content=orjson.dumps(body)
+        )
+        
+        if response.status_code in [200, 201]:
+            _invalidate_list_cache(api_token)
+            return {"success": True, "bot": orjson.loads(response.content)}
+        else:
+            return {
+                "success": False,
+                "error": f"API error: {response.status_code}",
+                "details": response.text
+            }
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -103,22 +159,16 @@ async def get_bot_status(bot_id: str, token: str = None) -> Dict[str, Any]:
     if not api_token:
         return {"error": "RECALL_AI_TOKEN not configured"}
     
-    headers = {
-        "Authorization": f"Token {api_token}",
-        "accept": "application/json"
-    }
+    headers = {"Authorization": f"Token {api_token}"}
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{RECALL_API_BASE}/bot/{bot_id}/",
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                return {"success": True, "bot": response.json()}
-            else:
-                return {"success": False, "error": response.text}
+        client = _get_client()
+        response = await client.get(f"/bot/{bot_id}/", headers=headers)
+        
+        if response.status_code == 200:
+            return {"success": True, "bot": orjson.loads(response.content)}
+        else:
+            return {"success": False, "error": response.text}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -129,22 +179,23 @@ async def list_bots(limit: int = 20, token: str = None) -> Dict[str, Any]:
     if not api_token:
         return {"error": "RECALL_AI_TOKEN not configured"}
     
-    headers = {
-        "Authorization": f"Token {api_token}",
-        "accept": "application/json"
-    }
+    cache_key = (api_token, limit)
+    entry = _list_cache.get(cache_key)
+    if entry and time.monotonic() - entry[0] < LIST_CACHE_TTL:
+        return entry[1]
+    
+    headers = {"Authorization": f"Token {api_token}"}
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{RECALL_API_BASE}/bot/?limit={limit}",
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                return {"success": True, "bots": response.json()}
-            else:
-                return {"success": False, "error": response.text}
+        client = _get_client()
+        response = await client.get("/bot/", headers=headers, params={"limit": limit})
+        
+        if response.status_code == 200:
+            result = {"success": True, "bots": orjson.loads(response.content)}
+            _list_cache[cache_key] = (time.monotonic(), result)
+            return result
+        else:
+            return {"success": False, "error": response.text}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -155,67 +206,82 @@ async def delete_bot(bot_id: str, token: str = None) -> Dict[str, Any]:
     if not api_token:
         return {"error": "RECALL_AI_TOKEN not configured"}
     
-    headers = {
-        "Authorization": f"Token {api_token}",
-        "accept": "application/json"
-    }
+    headers = {"Authorization": f"Token {api_token}"}
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.delete(
-                f"{RECALL_API_BASE}/bot/{bot_id}/",
-                headers=headers
-            )
-            
-            if response.status_code in [200, 204]:
-                return {"success": True}
-            else:
-                return {"success": False, "error": response.text}
+        client = _get_client()
+        response = await client.delete(f"/bot/{bot_id}/", headers=headers)
+        
+        if response.status_code in [200, 204]:
+            _invalidate_list_cache(api_token)
+            return {"success": True}
+        else:
+            return {"success": False, "error": response.text}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+# Background event loop for the synchronous wrappers. One long-lived loop
+# (rather than a new loop per call) keeps the shared httpx pool usable.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Get the background loop, starting its daemon thread on first use (or after fork)."""
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="recall-api-loop", daemon=True).start()
+        return _loop
+
+
+# Upper bound (seconds) a request thread blocks waiting on run_async()
+RUN_ASYNC_TIMEOUT = 60
+
+
+def run_async(coro, timeout: float = RUN_ASYNC_TIMEOUT):
+    """
+    Run a coroutine on the shared background loop and block for its result.
+    Safe to call from any Flask/Celery thread; all callers share one loop and
+    therefore one Recall.ai connection pool.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout=timeout)
+
+
+@atexit.register
+def _shutdown_loop():
+    """Close the shared client and stop the background loop at interpreter exit."""
+    if _loop is None or _loop_pid != os.getpid() or not _loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(aclose_client(), _loop).result(timeout=5)
+    except Exception:
+        pass
+    _loop.call_soon_threadsafe(_loop.stop)
+
+
 # Synchronous wrappers for Flask routes
 def create_bot_sync(meeting_url: str, bot_name: str = "Alex", 
                     client_webpage_url: str = None, websocket_url: str = None,
                     token: str = None) -> Dict[str, Any]:
     """Synchronous wrapper for create_bot."""
-    import asyncio
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(
-            create_bot(meeting_url, bot_name, client_webpage_url, websocket_url, token)
-        )
-    finally:
-        loop.close()
+    return run_async(create_bot(meeting_url, bot_name, client_webpage_url, websocket_url, token))
 
 
 def get_bot_status_sync(bot_id: str, token: str = None) -> Dict[str, Any]:
     """Synchronous wrapper for get_bot_status."""
-    import asyncio
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(get_bot_status(bot_id, token))
-    finally:
-        loop.close()
+    return run_async(get_bot_status(bot_id, token))
 
 
 def list_bots_sync(limit: int = 20, token: str = None) -> Dict[str, Any]:
     """Synchronous wrapper for list_bots."""
-    import asyncio
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(list_bots(limit, token))
-    finally:
-        loop.close()
+    return run_async(list_bots(limit, token))
 
 
 def delete_bot_sync(bot_id: str, token: str = None) -> Dict[str, Any]:
     """Synchronous wrapper for delete_bot."""
-    import asyncio
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(delete_bot(bot_id, token))
-    finally:
-        loop.close()
-
+    return run_async(delete_bot(bot_id, token))
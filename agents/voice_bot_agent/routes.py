@@ -37,8 +37,8 @@ def dashboard():
     # Get recent bots
     bots = []
     if config['recall_token']:
-        from agents.voice_bot_agent.recall_api import list_bots_sync
-        result = list_bots_sync(limit=10, token=config['recall_token'])
+        from agents.voice_bot_agent import recall_api
+        result = recall_api.run_async(recall_api.list_bots(limit=10, token=config['recall_token']))
         if result.get('success'):
             bots = result.get('bots', {}).get('results', [])
     
@@ -64,15 +64,15 @@ def create_bot():
         flash('Recall.ai Token not configured. Go to Settings to add it.', 'error')
         return redirect(url_for('voice_bot.dashboard'))
     
-    from agents.voice_bot_agent.recall_api import create_bot_sync
+    from agents.voice_bot_agent import recall_api
     
-    result = create_bot_sync(
+    result = recall_api.run_async(recall_api.create_bot(
         meeting_url=meeting_url,
         bot_name=bot_name,
         client_webpage_url=config['client_url'],
         websocket_url=config['websocket_url'],
         token=config['recall_token']
-    )
+    ))
     
     if result.get('success'):
         bot_id = result.get('bot', {}).get('id', 'unknown')
@@ -90,9 +90,9 @@ def create_bot():
 def bot_status(bot_id):
     """Get status of a specific bot."""
     config = get_voice_bot_config()
-    from agents.voice_bot_agent.recall_api import get_bot_status_sync
+    from agents.voice_bot_agent import recall_api
     
-    result = get_bot_status_sync(bot_id, token=config['recall_token'])
+    result = recall_api.run_async(recall_api.get_bot_status(bot_id, token=config['recall_token']))
     return jsonify(result)
 
 
@@ -101,9 +101,9 @@ def bot_status(bot_id):
 def delete_bot(bot_id):
     """Delete/stop a bot."""
     config = get_voice_bot_config()
-    from agents.voice_bot_agent.recall_api import delete_bot_sync
+    from agents.voice_bot_agent import recall_api
     
-    result = delete_bot_sync(bot_id, token=config['recall_token'])
+    result = recall_api.run_async(recall_api.delete_bot(bot_id, token=config['recall_token']))
     
     if result.get('success'):
         flash('Bot stopped successfully', 'success')
@@ -129,15 +129,15 @@ def api_create_bot():
     if not config['recall_token']:
         return jsonify({'success': False, 'error': 'Recall.ai Token not configured'}), 500
     
-    from agents.voice_bot_agent.recall_api import create_bot_sync
+    from agents.voice_bot_agent import recall_api
     
-    result = create_bot_sync(
+    result = recall_api.run_async(recall_api.create_bot(
         meeting_url=meeting_url,
         bot_name=bot_name,
         client_webpage_url=config['client_url'],
         websocket_url=config['websocket_url'],
         token=config['recall_token']
-    )
+    ))
     
     return jsonify(result)
 
@@ -178,8 +178,8 @@ def stop_server():
 def api_list_bots():
     """API endpoint to list bots (returns JSON)."""
     config = get_voice_bot_config()
-    from agents.voice_bot_agent.recall_api import list_bots_sync
+    from agents.voice_bot_agent import recall_api
     
-    result = list_bots_sync(limit=20, token=config['recall_token'])
+    result = recall_api.run_async(recall_api.list_bots(limit=20, token=config['recall_token']))
     return jsonify(result)
 
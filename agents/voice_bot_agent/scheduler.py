@@ -1,16 +1,17 @@
 import logging
 import os
+import time
 import hashlib
+import asyncio
+import threading
 from datetime import datetime, timezone, timedelta
-from dateutil import parser
-import requests
 
 from app import app
-from models import db, User, BotConfig
+from models import db, User
 from agents.meeting_agent.service import MeetingAgentService
-from agents.voice_bot_agent.recall_api import create_bot_sync, list_bots_sync
+from agents.voice_bot_agent.recall_api import create_bot, list_bots_sync, run_async
 from agents.voice_bot_agent.server_manager import VoiceServerManager
-from utils.ms_auth import get_valid_access_token
+from utils.ms_auth import get_valid_access_token_with_expiry
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,7 @@ def was_recently_joined(join_url, cooldown_seconds=600):
             exists = client.exists(cache_key)
             if exists:
                 ttl = client.ttl(cache_key)
-                logger.info(f"   -> Redis: Already joined, {ttl}s remaining in cooldown")
+                logger.debug("   -> Redis: Already joined, %ss remaining in cooldown", ttl)
                 return True
             return False
         except Exception as e:
@@ -57,63 +58,134 @@ def mark_as_joined(join_url, cooldown_seconds=600):
     if client:
         try:
             client.setex(cache_key, cooldown_seconds, "1")
-            logger.info(f"   -> Redis: Marked as joined (cooldown: {cooldown_seconds}s)")
+            logger.debug("   -> Redis: Marked as joined (cooldown: %ss)", cooldown_seconds)
             return True
         except Exception as e:
             logger.warning(f"Redis set failed: {e}")
     return False
 
 
+# Per-process Graph token cache: user_id -> (stored ciphertext, access_token, expires_at_epoch)
+_token_cache = {}
+
+# Re-resolve a cached token once it is this close (seconds) to expiry
+TOKEN_CACHE_MIN_TTL = 60
+
+
+def _cached_access_token(user):
+    """
+    Return a valid Graph access token for the user, serving it from the
+    in-process cache while it has more than TOKEN_CACHE_MIN_TTL seconds left.
+    Entries are only served while the freshly loaded row still stores the same
+    token, so a disconnect or re-login in the web process takes effect at once.
+    """
+    settings = user.settings
+    stored = settings._ms_access_token if settings else None
+    if not stored:
+        _token_cache.pop(user.id, None)
+        return None
+    
+    cached = _token_cache.get(user.id)
+    if cached and cached[0] == stored and cached[2] - time.time() > TOKEN_CACHE_MIN_TTL:
+        return cached[1]
+    
+    token, expires_at = get_valid_access_token_with_expiry(settings, db)
+    if token and expires_at:
+        # Read after the call: a refresh here replaces the stored ciphertext
+        _token_cache[user.id] = (settings._ms_access_token, token, expires_at)
+    else:
+        _token_cache.pop(user.id, None)
+    return token
+
+
+# Minimum seconds between scheduler runs for the same user
+SCHEDULE_DEBOUNCE_SECONDS = 20
+
+# Per-user single-flight guard: user_id -> lock, user_id -> monotonic start of last run
+_inflight = {}
+_inflight_guard = threading.Lock()
+_last_run = {}
+
+
+# Auto-join poll back-off (seconds). Calendar events are fetched 10 minutes
+# ahead, but ad-hoc chat meetings can appear at any time, so idle users are
+# re-checked every couple of minutes; users with nothing to do wait longer.
+IDLE_SCAN_INTERVAL = 120
+INACTIVE_SCAN_INTERVAL = 600
+
+
+def _schedule_next_scan(bot_config, seconds):
+    """Set when scan_all_voice_bots should next poll this user (0 = next tick)."""
+    bot_config.next_scan_at = datetime.utcnow() + timedelta(seconds=seconds)
+    db.session.commit()
+
+
 def check_and_join_meetings(user_id):
+    """
+    Check for upcoming meetings and auto-join if enabled.
+    Runs at most once per SCHEDULE_DEBOUNCE_SECONDS per user, and never
+    concurrently for the same user (route calls and Celery ticks can overlap).
+    """
+    if time.monotonic() - _last_run.get(user_id, float('-inf')) < SCHEDULE_DEBOUNCE_SECONDS:
+        return {"status": "debounced"}
+    
+    with _inflight_guard:
+        lock = _inflight.setdefault(user_id, threading.Lock())
+    if not lock.acquire(blocking=False):
+        return {"status": "busy"}
+    
+    try:
+        _last_run[user_id] = time.monotonic()
+        return _check_and_join_meetings(user_id)
+    finally:
+        lock.release()
+
+
+def _check_and_join_meetings(user_id):
     """
     Check for upcoming meetings and auto-join if enabled.
     Now checks BOTH calendar events AND recent chats (for Meet Now/channel meetings).
     """
-    logger.info(f"checking schedule for user {user_id}")
+    logger.debug("checking schedule for user %s", user_id)
     with app.app_context():
         user = db.session.get(User, user_id)
         if not user or not user.bot_config or not user.bot_config.is_enabled:
-            logger.info("Bot disabled for user")
+            logger.debug("Bot disabled for user")
             return {"status": "disabled"}
             
-        token = get_valid_access_token(user.settings, db)
+        token = _cached_access_token(user)
         if not token:
             logger.warning("No Access Token")
+            _schedule_next_scan(user.bot_config, INACTIVE_SCAN_INTERVAL)
             return {"status": "no_token"}
             
         ms_service = MeetingAgentService(user)
         headers = {"Authorization": f"Bearer {token}"}
-        GRAPH_API = "https://graph.microsoft.com/v1.0"
         
         # Time window
         now = datetime.now(timezone.utc)
-        start_str = now.strftime('%Y-%m-%dT%H:%M:%SZ')
-        end_str = (now + timedelta(minutes=10)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        now_s = now.replace(microsecond=0)
+        start_str = now_s.isoformat().replace('+00:00', 'Z')
+        end_str = (now_s + timedelta(minutes=10)).isoformat().replace('+00:00', 'Z')
         
-        # 1. Get Calendar Events
-        cal_events = ms_service._get_calendar_events(headers, start_str, end_str)
-        logger.info(f"Found {len(cal_events)} calendar events")
+        # 1 + 2. Calendar events and recent chats (catches Meet Now, channel
+        # meetings) are independent Graph queries, so run them concurrently
+        async def _fetch_graph():
+            return await asyncio.gather(
+                asyncio.to_thread(ms_service._get_calendar_events, headers, start_str, end_str),
+                asyncio.to_thread(ms_service._get_recent_chats, headers, start_str)
+            )
         
-        # 2. Get Recent Chats (catches Meet Now, channel meetings)
-        chat_meetings = ms_service._get_recent_chats(headers, start_str)
-        logger.info(f"Found {len(chat_meetings)} chat meetings")
+        cal_events, chat_meetings = run_async(_fetch_graph())
+        logger.debug("Found %d calendar events, %d chat meetings", len(cal_events), len(chat_meetings))
         
         # 3. Combine into unique meetings by join URL
         unique_meetings = {}
         
         for ev in cal_events:
+            # calendarView already selects onlineMeeting, onlineMeetingUrl,
+            # bodyPreview and body, so no per-event refetch is needed
             join_url = ms_service._extract_join_url(ev)
-            
-            # Fallback: Fetch full event if missing URL
-            if not join_url:
-                try:
-                    full_resp = requests.get(f"{GRAPH_API}/me/events/{ev['id']}", headers=headers)
-                    if full_resp.status_code == 200:
-                        full_event = full_resp.json()
-                        join_url = ms_service._extract_join_url(full_event)
-                except:
-                    pass
-            
             if join_url:
                 unique_meetings[join_url] = {
                     "joinUrl": join_url,
@@ -130,22 +202,20 @@ def check_and_join_meetings(user_id):
                     "start_time": None
                 }
         
-        logger.info(f"Total unique meetings to check: {len(unique_meetings)}")
+        logger.debug("Total unique meetings to check: %d", len(unique_meetings))
+        
+        # Keep polling every tick while meetings are around; back off otherwise
+        _schedule_next_scan(user.bot_config, 0 if unique_meetings else IDLE_SCAN_INTERVAL)
+        if not unique_meetings:
+            return {"status": "success", "joined": 0}
         
         # 4. Get already joined bots from Recall API
         recall_token = user.bot_config.recall_ai_token
         active_bots_data = list_bots_sync(token=recall_token)
-        active_bots = active_bots_data.get('results', [])
-        if 'bots' in active_bots_data:
-             active_bots = active_bots_data['bots'].get('results', [])
-        
-        joined_urls = set()
-        for b in active_bots:
-            m_url = b.get('meeting_url')
-            if isinstance(m_url, str):
-                joined_urls.add(m_url)
+        active_bots = active_bots_data.get('bots', active_bots_data).get('results', [])
+        joined_urls = {b['meeting_url'] for b in active_bots if isinstance(b.get('meeting_url'), str)}
 
-        joined_count = 0
+        to_join = []
         
         # 5. Process each meeting
         for meeting in unique_meetings.values():
@@ -153,11 +223,11 @@ def check_and_join_meetings(user_id):
             subject = meeting["subject"]
             start_time_str = meeting.get("start_time")
             
-            logger.info(f"Checking: '{subject}' | URL: {join_url[:40]}...")
+            logger.debug("Checking: '%s' | URL: %.40s...", subject, join_url)
             
             # Check 1: Already joined (from Recall API)
             if join_url in joined_urls:
-                logger.info("   -> Already joined (API), skipping")
+                logger.debug("   -> Already joined (API), skipping")
                 continue
             
             # Check 2: Recently joined (from Redis cache - shared across workers)
@@ -167,41 +237,56 @@ def check_and_join_meetings(user_id):
             # Time check (only for calendar events with start time)
             if start_time_str:
                 try:
-                    start_dt = parser.isoparse(start_time_str)
+                    start_dt = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
                     if not start_dt.tzinfo:
                         start_dt = start_dt.replace(tzinfo=timezone.utc)
                     else:
                         start_dt = start_dt.astimezone(timezone.utc)
                     
                     time_to_meeting = (start_dt - now).total_seconds()
-                    logger.info(f"   -> Starts in: {time_to_meeting:.0f}s")
+                    logger.debug("   -> Starts in: %.0fs", time_to_meeting)
                     
                     # Only join if within window: 5 min before to 3 min after
                     if not (-300 < time_to_meeting < 180):
-                        logger.info("   -> Outside time window, skipping")
+                        logger.debug("   -> Outside time window, skipping")
                         continue
                 except Exception as e:
                     logger.warning(f"   -> Date parse error: {e}")
             else:
                 # For chat meetings without start time, always try to join
-                logger.info("   -> Chat meeting (no start time), attempting join...")
+                logger.debug("   -> Chat meeting (no start time), attempting join...")
             
             # JOIN!
             logger.info(f"   -> JOINING '{subject}'!")
             
             # Mark as joined BEFORE creating bot (prevents race condition)
             mark_as_joined(join_url, cooldown_seconds=600)
-            
-            VoiceServerManager.start_server()
-            
-            create_bot_sync(
+            to_join.append(join_url)
+        
+        if not to_join:
+            return {"status": "success", "joined": 0}
+        
+        VoiceServerManager.start_server()
+        
+        # 6. Create all bots concurrently on the shared Recall loop
+        bot_config = user.bot_config
+        coros = [
+            create_bot(
                 meeting_url=join_url,
-                bot_name=user.bot_config.bot_name or "Alex",
-                client_webpage_url=user.bot_config.voice_bot_client_url,
-                websocket_url=user.bot_config.voice_bot_websocket_url,
+                bot_name=bot_config.bot_name or "Alex",
+                client_webpage_url=bot_config.voice_bot_client_url,
+                websocket_url=bot_config.voice_bot_websocket_url,
                 token=recall_token
             )
-            
-            joined_count += 1
+            for join_url in to_join
+        ]
+        
+        async def _create_all():
+            return await asyncio.gather(*coros, return_exceptions=True)
+        
+        results = run_async(_create_all())
+        for join_url, result in zip(to_join, results):
+            if isinstance(result, Exception) or not result.get("success"):
+                logger.warning(f"   -> Bot creation failed for {join_url[:40]}...: {result}")
                 
-        return {"status": "success", "joined": joined_count}
+        return {"status": "success", "joined": len(to_join)}
@@ -9,13 +9,14 @@ Or via Celery worker process.
 """
 
 import asyncio
-import json
+import orjson
 import logging
 import os
 import time
 import re
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Deque
 from datetime import datetime
 from dotenv import load_dotenv
 import websockets
@@ -23,6 +24,23 @@ from websockets.legacy.server import WebSocketServerProtocol, serve
 from websockets.legacy.client import connect
 from openai import AsyncOpenAI
 import httpx
+from functools import lru_cache
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # pure-Python fallback in fuzzy_match
+    Levenshtein = None
+
+try:
+    import ahocorasick
+except ImportError:  # DISMISSAL_RE fallback in detect_dismissal
+    ahocorasick = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
 
 # Configure logging
 logging.basicConfig(
@@ -52,27 +70,84 @@ TIMEOUT_SECONDS = 50
 BOT_NAME = "alex"
 SAMPLE_RATE = 48000
 WAKE_WORDS = ["hello alex", "hey alex", "alex"]
+WAKE_WORDS_LOWER = [w.lower().strip() for w in WAKE_WORDS]
 DISMISSAL_PHRASES = ["that's all", "thanks alex", "goodbye", "bye", "see you", "stop"]
 
+# Compiled once: WAKE_RE finds/strips exact wake words, DISMISSAL_RE keeps the
+# plain substring semantics of the phrase list
+WAKE_RE = re.compile(r'\b(' + '|'.join(re.escape(w) for w in WAKE_WORDS) + r')\b', re.IGNORECASE)
+DISMISSAL_RE = re.compile('|'.join(re.escape(p) for p in DISMISSAL_PHRASES), re.IGNORECASE)
+
+# Aho-Corasick automaton over the dismissal phrases: one pass over the text
+# regardless of how many phrases there are
+DISMISSAL_AUTOMATON = None
+if ahocorasick is not None:
+    DISMISSAL_AUTOMATON = ahocorasick.Automaton()
+    for _phrase in DISMISSAL_PHRASES:
+        DISMISSAL_AUTOMATON.add_word(_phrase.lower(), _phrase)
+    DISMISSAL_AUTOMATON.make_automaton()
+
 # Speaker diarization settings (for multi-person meetings)
 SPEAKER_LOCK_TIMEOUT = 60  # Seconds before speaker lock expires
 
+# TTS text chunking: LLM tokens are buffered and sent to Deepgram at sentence
+# ends, or at a clause break once at least TTS_CLAUSE_MIN_CHARS are buffered
+TTS_CLAUSE_MIN_CHARS = 40
+_SENTENCE_END_RE = re.compile(r'.*(?:[.!?;]\s|\n)', re.DOTALL)
+_CLAUSE_END_RE = re.compile(r'.*[,:]\s', re.DOTALL)
+# Chunks produced within this window (seconds) are coalesced into one Speak frame
+TTS_COALESCE_SECONDS = 0.03
+# Upper bound (seconds) on waiting for Deepgram's Flushed ack after a Flush
+TTS_FLUSH_WAIT_SECONDS = 0.6
+
+# Echo detection: bot responses are indexed by hashed 16-char shingles so most
+# transcripts are ruled out by a set check before any substring scan
+ECHO_SHINGLE_SIZE = 16
+ECHO_SHINGLE_STRIDE = 8
+_ECHO_MIN_HASHED_LEN = ECHO_SHINGLE_SIZE + ECHO_SHINGLE_STRIDE - 1
+
+# Meeting memory bounds: once the buffer is full or over the token budget, the
+# oldest half is folded into a heuristic summary (first sentence of each turn)
+MEMORY_MAX_MESSAGES = 40
+MEMORY_TOKEN_BUDGET = 3000
+MEMORY_SUMMARY_MAX_CHARS = 2000
+MAX_RECENT_RESPONSES = 5
+_CHARS_PER_TOKEN = 4
+_FIRST_SENTENCE_RE = re.compile(r'.*?[.!?](?=\s|$)', re.DOTALL)
+
+# Deepgram TTS control frames never change, so serialize them once
+_TTS_FLUSH_MSG = orjson.dumps({"type": "Flush"}).decode()
+_TTS_CLEAR_MSG = orjson.dumps({"type": "Clear"}).decode()
+_TTS_CLOSE_MSG = orjson.dumps({"type": "Close"}).decode()
+
 # ClickUp configuration
 CLICKUP_SPACE_NAME = "AI Context"
 CLICKUP_SUMMARY_DOC_NAME = "Daily Standup Summary By AI"
 CLICKUP_BASE_URL = "https://api.clickup.com/api/v2"
+SUMMARY_REFRESH_SECONDS = 600  # Background ClickUp summary refresh interval
+
+# TTS audio frames buffered for the browser; oldest are dropped if it falls behind
+AUDIO_OUT_QUEUE_SIZE = 64
+# Frames already queued are sent together, up to this many per browser message
+AUDIO_BATCH_MAX_FRAMES = 3
 
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
+def _dumps(obj: Any) -> str:
+    """orjson-encode to str: websockets sends str as a text frame, bytes as binary."""
+    return orjson.dumps(obj).decode()
+
+
+@lru_cache(maxsize=4096)
 def levenshtein_distance(s1: str, s2: str) -> int:
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+        s1, s2 = s2, s1
     if len(s2) == 0:
         return len(s1)
-    previous_row = range(len(s2) + 1)
+    previous_row = list(range(len(s2) + 1))
     for i, c1 in enumerate(s1):
         current_row = [i + 1]
         for j, c2 in enumerate(s2):
@@ -83,17 +158,29 @@ def levenshtein_distance(s1: str, s2: str) -> int:
 
 def fuzzy_match(text: str, target: str, threshold: float = 0.7) -> bool:
     text, target = text.lower().strip(), target.lower().strip()
-    if target in text:
-        return True
+    # Score whole-word windows only, so the target can't match inside a longer word
+    # (exact whole-word hits are already caught by WAKE_RE in detect_wake_word)
     words, target_words = text.split(), target.split()
     for i in range(len(words) - len(target_words) + 1):
         phrase = " ".join(words[i:i + len(target_words)])
-        similarity = 1 - (levenshtein_distance(phrase, target) / max(len(phrase), len(target)))
+        if Levenshtein is not None:
+            # Same normalization as below (distance / longer length), in C
+            similarity = Levenshtein.normalized_similarity(phrase, target)
+        else:
+            similarity = 1 - (levenshtein_distance(phrase, target) / max(len(phrase), len(target)))
         if similarity >= threshold:
             return True
     return False
 
 
+def _shingles(text: str, stride: int) -> frozenset:
+    """Hashes of every `stride`-th ECHO_SHINGLE_SIZE-char window of text."""
+    return frozenset(
+        hash(text[i:i + ECHO_SHINGLE_SIZE])
+        for i in range(0, len(text) - ECHO_SHINGLE_SIZE + 1, stride)
+    )
+
+
 # =============================================================================
 # CLICKUP SUMMARY LOADER
 # =============================================================================
@@ -107,6 +194,16 @@ class ClickUpSummaryLoader:
         self.summary: str = ""
         self.loaded_at: Optional[datetime] = None
         self.source: str = ""
+        # Long-lived client: every refresh reuses the pooled ClickUp connection
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=HTTP2_ENABLED,
+            headers=self.headers,
+            limits=httpx.Limits(max_keepalive_connections=4)
+        )
+    
+    async def aclose(self):
+        await self._client.aclose()
     
     async def load_summary(self) -> bool:
         """Load the pre-made summary from ClickUp Doc."""
@@ -115,73 +212,73 @@ class ClickUpSummaryLoader:
         logger.info(f"🔑 ClickUp API Key starts with: {key_preview}...")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Get teams
-                response = await client.get(f"{CLICKUP_BASE_URL}/team", headers=self.headers)
-                
-                # Debug: Log full response on error
-                if response.status_code != 200:
-                    logger.error(f"❌ ClickUp /team failed: {response.status_code}")
-                    logger.error(f"   Response: {response.text[:200]}")
-                    return False
-                
-                teams = response.json().get("teams", [])
-                if not teams:
-                    logger.warning("No teams found in ClickUp")
-                    return False
-                
-                team_id = teams[0]["id"]
-                
-                # Get docs
-                docs_url = f"https://api.clickup.com/api/v3/workspaces/{team_id}/docs"
-                response = await client.get(docs_url, headers=self.headers)
-                
-                if response.status_code != 200:
-                    return False
-                
-                docs = response.json().get("docs", [])
-                target_doc = None
-                for doc in docs:
-                    if doc.get("name", "").lower() == CLICKUP_SUMMARY_DOC_NAME.lower():
-                        target_doc = doc
-                        break
-                
-                if not target_doc:
-                    return False
-                
-                doc_id = target_doc["id"]
-                
-                # Get doc pages
-                pages_url = f"https://api.clickup.com/api/v3/workspaces/{team_id}/docs/{doc_id}/pages"
-                response = await client.get(pages_url, headers=self.headers)
-                
-                if response.status_code != 200:
-                    return False
-                
-                pages_data = response.json()
-                pages = pages_data if isinstance(pages_data, list) else pages_data.get("pages", [])
-                if not pages:
-                    return False
-                
-                page_id = pages[0]["id"]
-                page_url = f"https://api.clickup.com/api/v3/workspaces/{team_id}/docs/{doc_id}/pages/{page_id}"
-                response = await client.get(page_url, headers=self.headers)
-                
-                if response.status_code != 200:
-                    return False
-                
-                page_data = response.json()
-                content = page_data.get("content", "")
-                
-                if content and len(content) > 10:
-                    self.summary = content
-                    self.loaded_at = datetime.now()
-                    self.source = f"ClickUp Doc: {CLICKUP_SUMMARY_DOC_NAME}"
-                    logger.info(f"✅ Loaded summary from ClickUp ({len(content)} chars)")
-                    return True
-                
+            client = self._client
+            # Get teams
+            response = await client.get(f"{CLICKUP_BASE_URL}/team")
+            
+            # Debug: Log full response on error
+            if response.status_code != 200:
+                logger.error(f"❌ ClickUp /team failed: {response.status_code}")
+                logger.error(f"   Response: {response.text[:200]}")
                 return False
-                
+            
+            teams = response.json().get("teams", [])
+            if not teams:
+                logger.warning("No teams found in ClickUp")
+                return False
+            
+            team_id = teams[0]["id"]
+            
+            # Get docs
+            docs_url = f"https://api.clickup.com/api/v3/workspaces/{team_id}/docs"
+            response = await client.get(docs_url)
+            
+            if response.status_code != 200:
+                return False
+            
+            docs = response.json().get("docs", [])
+            target_doc = None
+            for doc in docs:
+                if doc.get("name", "").lower() == CLICKUP_SUMMARY_DOC_NAME.lower():
+                    target_doc = doc
+                    break
+            
+            if not target_doc:
+                return False
+            
+            doc_id = target_doc["id"]
+            
+            # Get doc pages
+            pages_url = f"https://api.clickup.com/api/v3/workspaces/{team_id}/docs/{doc_id}/pages"
+            response = await client.get(pages_url)
+            
+            if response.status_code != 200:
+                return False
+            
+            pages_data = response.json()
+            pages = pages_data if isinstance(pages_data, list) else pages_data.get("pages", [])
+            if not pages:
+                return False
+            
+            page_id = pages[0]["id"]
+            page_url = f"https://api.clickup.com/api/v3/workspaces/{team_id}/docs/{doc_id}/pages/{page_id}"
+            response = await client.get(page_url)
+            
+            if response.status_code != 200:
+                return False
+            
+            page_data = response.json()
+            content = page_data.get("content", "")
+            
+            if content and len(content) > 10:
+                self.summary = content
+                self.loaded_at = datetime.now()
+                self.source = f"ClickUp Doc: {CLICKUP_SUMMARY_DOC_NAME}"
+                logger.info(f"✅ Loaded summary from ClickUp ({len(content)} chars)")
+                return True
+            
+            return False
+            
         except Exception as e:
             logger.error(f"Failed to load from ClickUp: {e}")
             return False
@@ -196,29 +293,52 @@ class ClickUpSummaryLoader:
 # MEETING MEMORY
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class MeetingMemory:
     conversation_summary: str = ""
-    recent_messages: List[Dict[str, str]] = field(default_factory=list)
+    recent_messages: Deque[Dict[str, str]] = field(default_factory=lambda: deque(maxlen=MEMORY_MAX_MESSAGES))
+    _chars: int = 0
     
     def add_bot_interaction(self, role: str, content: str):
-        if content.strip():
-            self.recent_messages.append({"role": role, "content": content.strip()})
+        content = content.strip()
+        if content:
+            self._maybe_summarize(len(content))
+            self.recent_messages.append({"role": role, "content": content})
+            self._chars += len(content)
+    
+    def _maybe_summarize(self, incoming_chars: int):
+        """Fold the oldest half of the buffer into conversation_summary when full or over budget."""
+        over_budget = (self._chars + incoming_chars) // _CHARS_PER_TOKEN > MEMORY_TOKEN_BUDGET
+        if not self.recent_messages or (len(self.recent_messages) < MEMORY_MAX_MESSAGES and not over_budget):
+            return
+        
+        lines = []
+        for _ in range(max(1, len(self.recent_messages) // 2)):
+            message = self.recent_messages.popleft()
+            self._chars -= len(message["content"])
+            match = _FIRST_SENTENCE_RE.match(message["content"])
+            first_sentence = match.group(0) if match else message["content"]
+            lines.append(f"- {message['role']}: {first_sentence[:200]}")
+        
+        summary = "\n".join(filter(None, [self.conversation_summary, *lines]))
+        if len(summary) > MEMORY_SUMMARY_MAX_CHARS:
+            summary = summary[-MEMORY_SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+        self.conversation_summary = summary
     
     def get_context_for_llm(self) -> List[Dict[str, str]]:
-        return [{"role": m["role"], "content": m["content"]} for m in self.recent_messages[-20:]]
+        return [{"role": m["role"], "content": m["content"]} for m in list(self.recent_messages)[-20:]]
 
 
 # =============================================================================
 # CONVERSATION STATE
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class ConversationState:
     is_active: bool = False
     last_interaction_time: float = 0
     agent_is_speaking: bool = False
-    recent_responses: List[str] = field(default_factory=list)
+    recent_responses: Deque[Tuple[str, frozenset]] = field(default_factory=lambda: deque(maxlen=MAX_RECENT_RESPONSES))  # (lowercased, shingles)
     interrupted: bool = False
     memory: MeetingMemory = field(default_factory=MeetingMemory)
     
@@ -247,7 +367,7 @@ class ConversationState:
     def reset_for_new_meeting(self):
         self.is_active = False
         self.interrupted = False
-        self.recent_responses = []
+        self.recent_responses = deque(maxlen=MAX_RECENT_RESPONSES)
         self.memory = MeetingMemory()
         self.active_speaker = None
         self.speaker_lock_time = 0
@@ -302,19 +422,40 @@ class ConversationState:
         return False
     
     def detect_wake_word(self, text: str) -> bool:
-        for wake_word in WAKE_WORDS:
-            if fuzzy_match(text.lower(), wake_word, threshold=0.75):
+        # Fast path: exact wake word hit, no fuzzy scoring needed
+        match = WAKE_RE.search(text)
+        if match:
+            logger.info(f"Wake word detected: '{match.group(1).lower()}'")
+            return True
+        text = text.lower().strip()
+        for wake_word in WAKE_WORDS_LOWER:
+            if fuzzy_match(text, wake_word, threshold=0.75):
                 logger.info(f"Wake word detected: '{wake_word}'")
                 return True
         return False
     
     def detect_dismissal(self, text: str) -> bool:
-        return any(phrase in text.lower() for phrase in DISMISSAL_PHRASES)
+        if DISMISSAL_AUTOMATON is not None:
+            return next(DISMISSAL_AUTOMATON.iter(text.lower()), None) is not None
+        return DISMISSAL_RE.search(text) is not None
+    
+    def remember_response(self, response: str):
+        """Store a bot response for echo detection, with every shingle hashed."""
+        response_lower = response.lower()
+        self.recent_responses.append((response_lower, _shingles(response_lower, 1)))
     
     def is_echo(self, transcript: str) -> bool:
         transcript_lower = transcript.lower().strip()
-        for response in self.recent_responses[-5:]:
-            if transcript_lower in response.lower() or response.lower() in transcript_lower:
+        # Responses keep every shingle and the transcript every stride-th one, so a
+        # containment either way of at least _ECHO_MIN_HASHED_LEN chars always
+        # shares a hash; shorter strings skip the hash check
+        transcript_short = len(transcript_lower) < _ECHO_MIN_HASHED_LEN
+        transcript_shingles = frozenset() if transcript_short else _shingles(transcript_lower, ECHO_SHINGLE_STRIDE)
+        for response_lower, response_shingles in self.recent_responses:
+            hashed = not transcript_short and len(response_lower) >= _ECHO_MIN_HASHED_LEN
+            if hashed and transcript_shingles.isdisjoint(response_shingles):
+                continue
+            if transcript_lower in response_lower or response_lower in transcript_lower:
                 return True
         return False
     
@@ -355,16 +496,29 @@ async def connect_to_deepgram_stt():
 class DeepgramTTSStreamer:
     """Real-time TTS streaming using Deepgram WebSocket API."""
     
+    # Read on every audio frame and LLM token; slots skip the per-instance __dict__
+    __slots__ = (
+        'browser_ws', 'tts_ws', 'is_connected', 'audio_receiver_task', 'browser_sender_task',
+        '_audio_out_q', 'interrupted', 'chunks_sent', 'bytes_sent', 'first_audio_time',
+        'start_time', '_sentence_buffer', '_pending', '_pending_timer', '_flushed_evt'
+    )
+    
     def __init__(self, browser_ws: WebSocketServerProtocol):
         self.browser_ws = browser_ws
         self.tts_ws = None
         self.is_connected = False
         self.audio_receiver_task = None
+        self.browser_sender_task = None
+        self._audio_out_q: Optional[asyncio.Queue] = None
         self.interrupted = False
         self.chunks_sent = 0
         self.bytes_sent = 0
         self.first_audio_time = None
         self.start_time = None
+        self._sentence_buffer = ""
+        self._pending: List[str] = []
+        self._pending_timer: Optional[asyncio.TimerHandle] = None
+        self._flushed_evt = asyncio.Event()
     
     async def connect(self):
         """Connect to Deepgram TTS WebSocket."""
@@ -377,7 +531,9 @@ class DeepgramTTSStreamer:
             url,
             extra_headers=headers,
             open_timeout=30,
-            ping_interval=None,
+            # Protocol pings keep the session from idling out between turns;
+            # no ping_timeout, so a slow pong never tears down the stream
+            ping_interval=20,
             ping_timeout=None,
             close_timeout=5
         )
@@ -385,49 +541,80 @@ class DeepgramTTSStreamer:
         self.is_connected = True
         self.start_time = time.time()
         self.interrupted = False
+        self._audio_out_q = asyncio.Queue(maxsize=AUDIO_OUT_QUEUE_SIZE)
         self.audio_receiver_task = asyncio.create_task(self._receive_and_forward_audio())
+        self.browser_sender_task = asyncio.create_task(self._send_audio_to_browser())
         
         logger.info("✅ Connected to Deepgram TTS")
     
     async def _receive_and_forward_audio(self):
-        """Receive audio from Deepgram and forward to browser."""
+        """Receive audio from Deepgram and forward to browser (runs until close() cancels it)."""
         try:
-            while self.is_connected and self.tts_ws:
-                try:
-                    message = await asyncio.wait_for(self.tts_ws.recv(), timeout=0.1)
-                    
-                    if self.interrupted:
-                        continue
-                    
-                    if isinstance(message, bytes):
-                        if self.first_audio_time is None:
-                            self.first_audio_time = time.time()
-                            latency = (self.first_audio_time - self.start_time) * 1000
-                            logger.info(f"⚡ First audio chunk! Latency: {latency:.0f}ms")
-                        
-                        self.chunks_sent += 1
-                        self.bytes_sent += len(message)
-                        
-                        if not self.browser_ws.closed:
-                            await self.browser_ws.send(message)
-                    else:
-                        try:
-                            data = json.loads(message)
-                            msg_type = data.get("type", "")
-                            if msg_type == "Error":
-                                logger.error(f"❌ TTS Error: {data}")
-                        except:
-                            pass
-                
-                except asyncio.TimeoutError:
+            async for message in self.tts_ws:
+                if self.interrupted:
                     continue
-                except websockets.exceptions.ConnectionClosed:
-                    break
+                
+                if isinstance(message, bytes):
+                    if self.first_audio_time is None:
+                        self.first_audio_time = time.time()
+                        latency = (self.first_audio_time - self.start_time) * 1000
+                        logger.info(f"⚡ First audio chunk! Latency: {latency:.0f}ms")
+                    
+                    self.chunks_sent += 1
+                    self.bytes_sent += len(message)
+                    self._enqueue_audio(message)
+                else:
+                    try:
+                        data = orjson.loads(message)
+                        msg_type = data.get("type", "")
+                        if msg_type == "Flushed":
+                            self._flushed_evt.set()
+                        elif msg_type == "Error":
+                            logger.error(f"❌ TTS Error: {data}")
+                    except (ValueError, TypeError, AttributeError):
+                        pass
                     
         except asyncio.CancelledError:
             pass
+        except websockets.exceptions.ConnectionClosed:
+            pass
         except Exception as e:
             logger.error(f"TTS receiver error: {e}")
+        finally:
+            self.is_connected = False
+    
+    def _enqueue_audio(self, frame: bytes):
+        """Queue a frame for the browser without blocking Deepgram reads."""
+        try:
+            self._audio_out_q.put_nowait(frame)
+        except asyncio.QueueFull:
+            self._audio_out_q.get_nowait()  # Browser is behind: drop the oldest frame
+            self._audio_out_q.put_nowait(frame)
+    
+    def _drain_audio_queue(self):
+        if self._audio_out_q:
+            while not self._audio_out_q.empty():
+                self._audio_out_q.get_nowait()
+    
+    async def _send_audio_to_browser(self):
+        """Forward queued TTS audio to the browser (runs until close() cancels it)."""
+        try:
+            while True:
+                frame = await self._audio_out_q.get()
+                # Coalesce frames that are already waiting; PCM concatenates cleanly
+                if not self._audio_out_q.empty():
+                    frames = [frame]
+                    while len(frames) < AUDIO_BATCH_MAX_FRAMES and not self._audio_out_q.empty():
+                        frames.append(self._audio_out_q.get_nowait())
+                    frame = b"".join(frames)
+                await self.browser_ws.send(frame)
+        except asyncio.CancelledError:
+            pass
+        except websockets.exceptions.ConnectionClosed:
+            # Browser went away; nothing left to stream to
+            self.is_connected = False
+        except Exception as e:
+            logger.error(f"TTS browser sender error: {e}")
     
     async def send_text(self, text: str):
         """Send text to Deepgram TTS."""
@@ -435,33 +622,86 @@ class DeepgramTTSStreamer:
             return
         
         try:
-            await self.tts_ws.send(json.dumps({"type": "Speak", "text": text}))
+            await self.tts_ws.send(_dumps({"type": "Speak", "text": text}))
         except Exception as e:
             logger.error(f"Failed to send text to TTS: {e}")
     
+    def send_text_streaming(self, token: str):
+        """
+        Buffer an LLM token; whole sentences/clauses are queued for TTS.
+        Never awaits the socket, so the LLM stream keeps draining while the
+        coalescing timer task does the actual sends.
+        """
+        self._sentence_buffer += token
+        match = _SENTENCE_END_RE.match(self._sentence_buffer)
+        if not match and len(self._sentence_buffer) >= TTS_CLAUSE_MIN_CHARS:
+            match = _CLAUSE_END_RE.match(self._sentence_buffer)
+        if match:
+            self._sentence_buffer = self._sentence_buffer[match.end():]
+            self._queue_speak(match.group(0))
+    
+    def _queue_speak(self, text: str):
+        """Hold text for up to TTS_COALESCE_SECONDS so bursts go out as one frame."""
+        self._pending.append(text)
+        if self._pending_timer is None:
+            self._pending_timer = asyncio.get_running_loop().call_later(
+                TTS_COALESCE_SECONDS, lambda: asyncio.create_task(self._flush_pending())
+            )
+    
+    def _discard_pending(self):
+        if self._pending_timer:
+            self._pending_timer.cancel()
+            self._pending_timer = None
+        self._pending.clear()
+    
+    async def _flush_pending(self):
+        """Send all coalesced text as a single Speak frame."""
+        text = "".join(self._pending)
+        self._discard_pending()
+        if text:
+            await self.send_text(text)
+    
     async def flush(self):
-        """Send Flush to generate audio."""
+        """Send any buffered text, then Flush to generate audio."""
         if not self.is_connected or not self.tts_ws:
             return
+        if self._sentence_buffer:
+            self._pending.append(self._sentence_buffer)
+            self._sentence_buffer = ""
+        await self._flush_pending()
+        self._flushed_evt.clear()
         try:
-            await self.tts_ws.send(json.dumps({"type": "Flush"}))
+            await self.tts_ws.send(_TTS_FLUSH_MSG)
         except Exception as e:
             logger.error(f"Failed to send flush: {e}")
     
+    async def wait_flushed(self, timeout: float = TTS_FLUSH_WAIT_SECONDS):
+        """Wait until Deepgram acknowledges the last Flush, or `timeout` passes."""
+        try:
+            await asyncio.wait_for(self._flushed_evt.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+    
     async def clear(self):
         """Send Clear to stop audio."""
         if not self.is_connected or not self.tts_ws:
             return
         self.interrupted = True
+        self._sentence_buffer = ""
+        self._discard_pending()
+        self._drain_audio_queue()
         try:
-            await self.tts_ws.send(json.dumps({"type": "Clear"}))
+            await self.tts_ws.send(_TTS_CLEAR_MSG)
+        except websockets.exceptions.ConnectionClosed:
+            # Only a closed socket forces a reconnect; interrupts keep the session
+            self.is_connected = False
         except Exception as e:
             logger.error(f"Failed to send clear: {e}")
-            # Mark as disconnected so we reconnect next time
-            self.is_connected = False
     
     def reset_for_new_response(self):
         self.interrupted = False
+        self._sentence_buffer = ""
+        self._discard_pending()
         self.first_audio_time = None
         self.start_time = time.time()
         self.chunks_sent = 0
@@ -484,16 +724,17 @@ class DeepgramTTSStreamer:
     async def close(self):
         self.is_connected = False
         
-        if self.audio_receiver_task:
-            self.audio_receiver_task.cancel()
-            try:
-                await self.audio_receiver_task
-            except asyncio.CancelledError:
-                pass
+        for task in (self.audio_receiver_task, self.browser_sender_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         
         if self.tts_ws:
             try:
-                await self.tts_ws.send(json.dumps({"type": "Close"}))
+                await self.tts_ws.send(_TTS_CLOSE_MSG)
                 await self.tts_ws.close()
             except:
                 pass
@@ -512,6 +753,8 @@ class WebSocketRelay:
         self.deepgram_stt_ws = None
         self.tts_streamer: Optional[DeepgramTTSStreamer] = None
         self.summary_loader = summary_loader
+        # (summary loaded_at, meeting summary) -> built system message
+        self._system_msg_cache: Optional[Tuple[Tuple[Optional[datetime], str], Dict[str, str]]] = None
     
     async def send_state_update(self):
         if not self.browser_ws:
@@ -522,16 +765,29 @@ class WebSocketRelay:
             "speaking": self.conversation_state.agent_is_speaking,
         }
         try:
-            await self.browser_ws.send(json.dumps(state))
+            await self.browser_ws.send(_dumps(state))
         except:
             pass
     
     def _build_system_message(self) -> Dict[str, str]:
+        # Only changes when ClickUp is reloaded or meeting memory is summarized;
+        # an identical prefix also keeps OpenAI's prompt cache warm
+        cache_key = (
+            self.summary_loader.loaded_at if self.summary_loader else None,
+            self.conversation_state.memory.conversation_summary
+        )
+        if self._system_msg_cache and self._system_msg_cache[0] == cache_key:
+            return self._system_msg_cache[1]
+        
         clickup_context = ""
         if self.summary_loader and self.summary_loader.summary:
             clickup_context = f"\n\n{self.summary_loader.get_summary_for_context()}"
         
-        return {
+        meeting_summary = self.conversation_state.memory.conversation_summary
+        if meeting_summary:
+            clickup_context += f"\n\n=== Earlier in this meeting ===\n{meeting_summary}"
+        
+        system_message = {
             "role": "system",
             "content": f"""You are {BOT_NAME}, a helpful AI assistant in a meeting.
 {clickup_context}
@@ -540,6 +796,8 @@ Guidelines:
 - Keep responses brief (1-3 sentences)
 - Don't use markdown formatting"""
         }
+        self._system_msg_cache = (cache_key, system_message)
+        return system_message
     
     async def _ensure_tts_ready(self):
         """Ensure TTS streamer is connected and healthy. Reconnect if needed."""
@@ -564,10 +822,6 @@ Guidelines:
         self.conversation_state.agent_is_speaking = True
         await self.send_state_update()
         
-        # Always ensure TTS is in a healthy state before streaming
-        await self._ensure_tts_ready()
-        
-        self.tts_streamer.reset_for_new_response()
         full_response = ""
         
         try:
@@ -577,13 +831,20 @@ Guidelines:
             
             logger.info("🤖 Streaming LLM → TTS...")
             
-            stream = await openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=400,
-                stream=True
-            )
+            # Open the LLM stream while (re)connecting TTS, so neither setup
+            # round-trip waits on the other
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._ensure_tts_ready())
+                llm_task = tg.create_task(openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=400,
+                    stream=True
+                ))
+            stream = llm_task.result()
+            
+            self.tts_streamer.reset_for_new_response()
             
             async for chunk in stream:
                 if self.conversation_state.interrupted:
@@ -593,15 +854,15 @@ Guidelines:
                 if chunk.choices and chunk.choices[0].delta.content:
                     token = chunk.choices[0].delta.content
                     full_response += token
-                    await self.tts_streamer.send_text(token)
+                    self.tts_streamer.send_text_streaming(token)
             
             if not self.conversation_state.interrupted:
                 await self.tts_streamer.flush()
-                await asyncio.sleep(0.5)
+                await self.tts_streamer.wait_flushed()
             
             if full_response and not self.conversation_state.interrupted:
                 self.conversation_state.memory.add_bot_interaction("assistant", full_response)
-                self.conversation_state.recent_responses.append(full_response)
+                self.conversation_state.remember_response(full_response)
             
         except Exception as e:
             logger.error(f"LLM→TTS error: {e}")
@@ -616,7 +877,7 @@ Guidelines:
         self.tts_streamer.reset_for_new_response()
         await self.tts_streamer.send_text(text)
         await self.tts_streamer.flush()
-        await asyncio.sleep(1.0)
+        await self.tts_streamer.wait_flushed(timeout=1.0)
     
     async def handle_transcript(self, transcript_text: str, is_final: bool, speaker_id: Optional[int] = None):
         """Handle transcribed text with speaker awareness for multi-person meetings."""
@@ -624,8 +885,12 @@ Guidelines:
         if not transcript_text:
             return
         
-        # Check for wake word presence
-        has_wake_word = self.conversation_state.detect_wake_word(transcript_text)
+        # Interim results only matter as an interruption signal while speaking
+        if not is_final and not self.conversation_state.agent_is_speaking:
+            return
+        
+        # Check for wake word presence (finals only; interims gate on word count)
+        has_wake_word = is_final and self.conversation_state.detect_wake_word(transcript_text)
         
         # Log speaker info for debugging
         if speaker_id is not None:
@@ -647,7 +912,7 @@ Guidelines:
                 if self.tts_streamer:
                     await self.tts_streamer.clear()
                 
-                await self.browser_ws.send(json.dumps({"type": "Interrupt", "reason": "user_speech"}))
+                await self.browser_ws.send(_dumps({"type": "Interrupt", "reason": "user_speech"}))
                 
                 if not is_final:
                     return
@@ -673,8 +938,7 @@ Guidelines:
             await self.send_state_update()
             
             # Remove wake word from transcript
-            for wake_word in WAKE_WORDS:
-                transcript_text = re.sub(r'\b' + re.escape(wake_word) + r'\b', '', transcript_text, flags=re.IGNORECASE)
+            transcript_text = WAKE_RE.sub('', transcript_text)
             transcript_text = transcript_text.strip() or "Hello"
         
         # Dismissal
@@ -713,12 +977,12 @@ Guidelines:
                         await deepgram_ws.send(message)
                     else:
                         try:
-                            data = json.loads(message)
+                            data = orjson.loads(message)
                             if data.get("type") == "Interrupt":
                                 self.conversation_state.interrupt()
                                 if self.tts_streamer:
                                     await self.tts_streamer.clear()
-                        except:
+                        except (ValueError, TypeError, AttributeError):
                             pass
             except websockets.exceptions.ConnectionClosed:
                 pass
@@ -730,7 +994,15 @@ Guidelines:
                         continue
                     
                     try:
-                        data = json.loads(message)
+                        # Pass the original text straight through to the browser
+                        await browser_ws.send(message)
+                        
+                        # Only Results carry transcripts; skip decoding Metadata,
+                        # SpeechStarted and UtteranceEnd events
+                        if '"Results"' not in message:
+                            continue
+                        
+                        data = orjson.loads(message)
                         
                         if data.get("type") == "Results":
                             alternatives = data.get("channel", {}).get("alternatives", [])
@@ -749,10 +1021,12 @@ Guidelines:
                                 
                                 if transcript:
                                     await self.handle_transcript(transcript, is_final, speaker_id)
-                        
-                        await browser_ws.send(json.dumps(data))
-                    except:
+                    except (ValueError, TypeError, AttributeError):
                         pass
+                    except websockets.exceptions.ConnectionClosed:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Transcript handling error: {e}")
             except websockets.exceptions.ConnectionClosed:
                 pass
         
@@ -765,9 +1039,6 @@ Guidelines:
         self.conversation_state.reset_for_new_meeting()
         
         try:
-            if self.summary_loader:
-                await self.summary_loader.load_summary()
-            
             deepgram_ws = await connect_to_deepgram_stt()
             self.deepgram_stt_ws = deepgram_ws
             
@@ -796,20 +1067,34 @@ Guidelines:
 # MAIN
 # =============================================================================
 
+async def refresh_summary_loop(summary_loader: ClickUpSummaryLoader, interval: float = SUMMARY_REFRESH_SECONDS):
+    """Keep the shared ClickUp summary fresh in the background."""
+    while True:
+        await summary_loader.load_summary()
+        await asyncio.sleep(interval)
+
+
 async def main():
     summary_loader = None
+    refresh_task = None
     if CLICKUP_API_KEY:
         summary_loader = ClickUpSummaryLoader(CLICKUP_API_KEY)
-        await summary_loader.load_summary()
+        refresh_task = asyncio.create_task(refresh_summary_loop(summary_loader))
     
     relay = WebSocketRelay(summary_loader)
     
-    async with serve(relay.handle_connection, "0.0.0.0", PORT):
-        logger.info(f"🚀 Voice Bot Server on ws://0.0.0.0:{PORT}")
-        logger.info(f"📣 Wake words: {', '.join(WAKE_WORDS)}")
-        logger.info(f"🔊 TTS: Deepgram WebSocket (aura-2-thalia-en)")
-        logger.info(f"🎤 STT: Deepgram WebSocket (nova-2)")
-        await asyncio.Future()
+    try:
+        async with serve(relay.handle_connection, "0.0.0.0", PORT):
+            logger.info(f"🚀 Voice Bot Server on ws://0.0.0.0:{PORT}")
+            logger.info(f"📣 Wake words: {', '.join(WAKE_WORDS)}")
+            logger.info(f"🔊 TTS: Deepgram WebSocket (aura-2-thalia-en)")
+            logger.info(f"🎤 STT: Deepgram WebSocket (nova-2)")
+            await asyncio.Future()
+    finally:
+        if refresh_task:
+            refresh_task.cancel()
+        if summary_loader:
+            await summary_loader.aclose()
 
 
 if __name__ == "__main__":
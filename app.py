@@ -20,6 +20,12 @@ def create_app(config_name=None):
     
     # Initialize extensions
     db.init_app(app)
+    if app.config.get('DEBUG'):
+        try:
+            from nplusone.ext.flask_sqlalchemy import NPlusOne
+            NPlusOne(app)
+        except ImportError:
+            app.logger.info("nplusone not installed; N+1 query detection disabled")
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
@@ -27,6 +33,7 @@ def create_app(config_name=None):
     
     @login_manager.user_loader
     def load_user(user_id):
+        # One-to-one configs are joined-loaded by the User mapping
         return db.session.get(User, int(user_id))
     
     # Register blueprints
@@ -1,12 +1,15 @@
 """
 Authentication Routes
 """
-from datetime import datetime
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from models import db, User, UserSettings, EmailAgentConfig, MeetingAgentConfig, BotConfig, ProcessedEmail, ProcessedMeeting, ActivityLog
-import msal
-import os
+import hashlib
+from utils.cache import cache_get_json, cache_set_json, cache_delete
+from utils.ms_auth import GRAPH_SCOPES, forget_tokens, get_msal_app
+from utils.rate_limit import limited_request
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -74,9 +77,19 @@ def login():
         user = User.query.filter_by(email=email).first()
         
         if user and user.check_password(password):
+            # check_password upgrades legacy hashes in place
+            if db.session.is_modified(user):
+                db.session.commit()
             login_user(user, remember=bool(remember))
-            user.last_login = datetime.utcnow()
-            db.session.commit()
+            
+            # last_login is advisory; write it in the background off the login path
+            now = datetime.utcnow()
+            try:
+                from celery_worker import touch_last_login
+                touch_last_login.delay(user.id, now.isoformat())
+            except Exception:
+                user.last_login = now
+                db.session.commit()
             
             next_page = request.args.get('next')
             return redirect(next_page or url_for('auth.dashboard'))
@@ -95,93 +108,225 @@ def logout():
     return redirect(url_for('auth.login'))
 
 
-@auth_bp.route('/dashboard')
-@login_required
-def dashboard():
-    """Main dashboard with statistics."""
-    from datetime import timedelta
-    
-    # Get statistics
-    stats = {
-        'emails_scanned': ProcessedEmail.query.filter_by(user_id=current_user.id).count(),
-        'meetings_processed': ProcessedMeeting.query.filter_by(user_id=current_user.id).count(),
-        'tasks_created_email': db.session.query(db.func.sum(ProcessedEmail.tasks_created)).filter_by(user_id=current_user.id).scalar() or 0,
-        'tasks_created_meeting': db.session.query(db.func.sum(ProcessedMeeting.tasks_created)).filter_by(user_id=current_user.id).scalar() or 0,
-        'standup_summaries': ProcessedMeeting.query.filter_by(user_id=current_user.id, standup_summary_created=True).count(),
+# Repeated "Test" clicks on the settings page reuse the last successful team list
+CLICKUP_TEAMS_TTL = 300
+
+# Dashboard config flags only change when the user edits settings
+CONFIG_STATUS_TTL = 3600
+
+
+def _config_status_key(user_id):
+    return f"cfg_status:{user_id}"
+
+
+def get_config_status(user):
+    """Configuration flags for the dashboard, cached in Redis per user."""
+    key = _config_status_key(user.id)
+    config_status = cache_get_json(key)
+    if config_status is None:
+        config_status = {
+            # Presence checks on the encrypted columns; no need to decrypt
+            'has_clickup_key': bool(user.settings and user.settings._clickup_api_key),
+            'has_openai_key': bool(user.settings and user.settings._openai_api_key),
+            'has_ms_token': bool(user.settings and user.settings._ms_access_token),
+            'email_configured': bool(user.email_config and user.email_config.clickup_list_id),
+            'meeting_configured': bool(user.meeting_config and user.meeting_config.clickup_list_id),
+        }
+        cache_set_json(key, config_status, CONFIG_STATUS_TTL)
+    return config_status
+
+
+def invalidate_config_status(user_id):
+    cache_delete(_config_status_key(user_id))
+
+
+# Stats and weekly charts only move when a scan records new items
+DASHBOARD_CACHE_TTL = 60
+
+
+def _dashboard_key(user_id):
+    return f"dash:{user_id}"
+
+
+def invalidate_dashboard(user_id):
+    """Drop the cached dashboard payload after a scan writes ProcessedEmail/ProcessedMeeting rows."""
+    cache_delete(_dashboard_key(user_id))
+
+
+def _dashboard_stats(user_id):
+    """
+    Dashboard counters in one round trip: one aggregate pass per table,
+    with standup summaries counted conditionally in the meeting scan.
+    """
+    emails = db.select(
+        db.func.count(ProcessedEmail.id).label('emails_scanned'),
+        db.func.coalesce(db.func.sum(ProcessedEmail.tasks_created), 0).label('tasks_created_email'),
+    ).where(ProcessedEmail.user_id == user_id).subquery()
+    
+    meetings = db.select(
+        db.func.count(ProcessedMeeting.id).label('meetings_processed'),
+        db.func.count(db.case((ProcessedMeeting.standup_summary_created.is_(True), 1))).label('standup_summaries'),
+        db.func.coalesce(db.func.sum(ProcessedMeeting.tasks_created), 0).label('tasks_created_meeting'),
+    ).where(ProcessedMeeting.user_id == user_id).subquery()
+    
+    # Both sides are single-row aggregates, so the join yields exactly one row
+    row = db.session.execute(
+        db.select(emails, meetings).select_from(emails.join(meetings, db.true()))
+    ).one()
+    return dict(row._mapping)
+
+
+def _daily_counts(model, user_id, start_dt, end_dt):
+    """Per-day (row count, tasks created) for a processed-item model, in one GROUP BY query."""
+    day_col = db.func.date(model.processed_at).label('day')
+    rows = db.session.query(
+        day_col,
+        db.func.count(model.id),
+        db.func.coalesce(db.func.sum(model.tasks_created), 0)
+    ).filter(
+        model.user_id == user_id,
+        model.processed_at >= start_dt,
+        model.processed_at < end_dt
+    ).group_by(day_col).all()
+    
+    # SQLite returns date() as 'YYYY-MM-DD' text, PostgreSQL as a date
+    return {
+        (date.fromisoformat(day) if isinstance(day, str) else day): (count, tasks)
+        for day, count, tasks in rows
     }
-    stats['total_tasks'] = stats['tasks_created_email'] + stats['tasks_created_meeting']
+
+
+def _weekly_counts(model, user_id, start_dt):
+    """
+    Seven (row count, tasks created) pairs starting at start_dt.
+    PostgreSQL fills empty days in SQL via generate_series; other dialects backfill in Python.
+    """
+    end_dt = start_dt + timedelta(days=7)
+    
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.execute(db.text(f"""
+            SELECT COALESCE(s.cnt, 0), COALESCE(s.tasks, 0)
+            FROM generate_series(CAST(:start AS timestamp), CAST(:start AS timestamp) + interval '6 days', interval '1 day') AS d
+            LEFT JOIN (
+                SELECT CAST(processed_at AS date) AS day, COUNT(*) AS cnt, SUM(tasks_created) AS tasks
+                FROM {model.__tablename__}
+                WHERE user_id = :uid AND processed_at >= :start AND processed_at < :end
+                GROUP BY 1
+            ) AS s ON s.day = CAST(d AS date)
+            ORDER BY d
+        """), {'uid': user_id, 'start': start_dt, 'end': end_dt}).all()
+        return [(count, tasks) for count, tasks in rows]
+    
+    days = _daily_counts(model, user_id, start_dt, end_dt)
+    return [days.get((start_dt + timedelta(days=i)).date(), (0, 0)) for i in range(7)]
+
+
+def _recent_items(user_id):
+    """
+    Recent activity (10), emails (5) and meetings (5) in one UNION ALL round trip.
+    Rows come back as dicts keyed by the model attribute names the dashboard template reads.
+    """
+    def top(kind, ts, label, tasks, agent_type, model, limit):
+        return db.select(
+            db.literal(kind).label('kind'),
+            ts.label('ts'),
+            label.label('label'),
+            tasks.label('tasks'),
+            agent_type.label('agent_type'),
+        ).where(model.user_id == user_id).order_by(ts.desc()).limit(limit).subquery()
     
-    # Calculate weekly data for charts
+    parts = [
+        top('activity', ActivityLog.created_at, ActivityLog.message,
+            db.literal(0), ActivityLog.agent_type, ActivityLog, 10),
+        top('email', ProcessedEmail.processed_at, ProcessedEmail.subject,
+            ProcessedEmail.tasks_created, db.literal('email'), ProcessedEmail, 5),
+        top('meeting', ProcessedMeeting.processed_at, ProcessedMeeting.meeting_subject,
+            ProcessedMeeting.tasks_created, db.literal('meeting'), ProcessedMeeting, 5),
+    ]
+    rows = db.session.execute(db.union_all(*(db.select(part) for part in parts))).all()
+    # UNION ALL does not preserve the per-branch ORDER BY
+    rows.sort(key=lambda row: row.ts or datetime.min, reverse=True)
+    
+    recent = {'activity': [], 'email': [], 'meeting': []}
+    for kind, ts, label, tasks, agent_type in rows:
+        if kind == 'activity':
+            recent[kind].append({'agent_type': agent_type, 'message': label, 'created_at': ts})
+        elif kind == 'email':
+            recent[kind].append({'subject': label, 'tasks_created': tasks, 'processed_at': ts})
+        else:
+            recent[kind].append({'meeting_subject': label, 'tasks_created': tasks, 'processed_at': ts})
+    return recent['activity'], recent['email'], recent['meeting']
+
+
+# Shared pool for running independent dashboard queries side by side
+_dashboard_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='dashboard')
+
+
+def _weekly_counts_concurrent(user_id, start_dt):
+    """
+    Email and meeting weekly series, queried in parallel.
+    Each worker pushes its own app context, so it gets its own session and pooled connection.
+    """
+    app = current_app._get_current_object()
+    
+    def run(model):
+        with app.app_context():
+            return _weekly_counts(model, user_id, start_dt)
+    
+    emails = _dashboard_pool.submit(run, ProcessedEmail)
+    meetings = _dashboard_pool.submit(run, ProcessedMeeting)
+    return emails.result(), meetings.result()
+
+
+def get_dashboard_payload(user_id):
+    """Stats and weekly chart series for the dashboard, cached in Redis per user."""
     today = datetime.utcnow().date()
     start_of_week = today - timedelta(days=today.weekday())  # Monday
     
-    weekly_emails = []
-    weekly_meetings = []
-    weekly_tasks = []
+    key = _dashboard_key(user_id)
+    payload = cache_get_json(key)
+    if payload is not None and payload.get('week_start') == start_of_week.isoformat():
+        return payload
     
-    for i in range(7):
-        day = start_of_week + timedelta(days=i)
-        next_day = day + timedelta(days=1)
-        
-        # Count emails for this day
-        email_count = ProcessedEmail.query.filter(
-            ProcessedEmail.user_id == current_user.id,
-            ProcessedEmail.processed_at >= datetime.combine(day, datetime.min.time()),
-            ProcessedEmail.processed_at < datetime.combine(next_day, datetime.min.time())
-        ).count()
-        weekly_emails.append(email_count)
-        
-        # Count meetings for this day
-        meeting_count = ProcessedMeeting.query.filter(
-            ProcessedMeeting.user_id == current_user.id,
-            ProcessedMeeting.processed_at >= datetime.combine(day, datetime.min.time()),
-            ProcessedMeeting.processed_at < datetime.combine(next_day, datetime.min.time())
-        ).count()
-        weekly_meetings.append(meeting_count)
-        
-        # Count tasks for this day
-        email_tasks = db.session.query(db.func.sum(ProcessedEmail.tasks_created)).filter(
-            ProcessedEmail.user_id == current_user.id,
-            ProcessedEmail.processed_at >= datetime.combine(day, datetime.min.time()),
-            ProcessedEmail.processed_at < datetime.combine(next_day, datetime.min.time())
-        ).scalar() or 0
-        
-        meeting_tasks = db.session.query(db.func.sum(ProcessedMeeting.tasks_created)).filter(
-            ProcessedMeeting.user_id == current_user.id,
-            ProcessedMeeting.processed_at >= datetime.combine(day, datetime.min.time()),
-            ProcessedMeeting.processed_at < datetime.combine(next_day, datetime.min.time())
-        ).scalar() or 0
-        
-        weekly_tasks.append(email_tasks + meeting_tasks)
+    stats = _dashboard_stats(user_id)
+    stats['total_tasks'] = stats['tasks_created_email'] + stats['tasks_created_meeting']
+    
+    week_start_dt = datetime.combine(start_of_week, datetime.min.time())
+    email_days, meeting_days = _weekly_counts_concurrent(user_id, week_start_dt)
     
-    # Get recent activity
-    recent_activity = ActivityLog.query.filter_by(user_id=current_user.id)\
-        .order_by(ActivityLog.created_at.desc()).limit(10).all()
+    payload = {
+        'week_start': start_of_week.isoformat(),
+        'stats': stats,
+        'weekly_emails': [count for count, _ in email_days],
+        'weekly_meetings': [count for count, _ in meeting_days],
+        'weekly_tasks': [e_tasks + m_tasks for (_, e_tasks), (_, m_tasks) in zip(email_days, meeting_days)],
+    }
+    cache_set_json(key, payload, DASHBOARD_CACHE_TTL)
+    return payload
+
+
+@auth_bp.route('/dashboard')
+@login_required
+def dashboard():
+    """Main dashboard with statistics."""
+    # Statistics and weekly data for charts
+    payload = get_dashboard_payload(current_user.id)
     
-    # Get recent processed items
-    recent_emails = ProcessedEmail.query.filter_by(user_id=current_user.id)\
-        .order_by(ProcessedEmail.processed_at.desc()).limit(5).all()
-    recent_meetings = ProcessedMeeting.query.filter_by(user_id=current_user.id)\
-        .order_by(ProcessedMeeting.processed_at.desc()).limit(5).all()
+    # Get recent activity and processed items
+    recent_activity, recent_emails, recent_meetings = _recent_items(current_user.id)
     
     # Check configuration status
-    config_status = {
-        'has_clickup_key': bool(current_user.settings and current_user.settings.clickup_api_key),
-        'has_openai_key': bool(current_user.settings and current_user.settings.openai_api_key),
-        'has_ms_token': bool(current_user.settings and current_user.settings.ms_access_token),
-        'email_configured': bool(current_user.email_config and current_user.email_config.clickup_list_id),
-        'meeting_configured': bool(current_user.meeting_config and current_user.meeting_config.clickup_list_id),
-    }
+    config_status = get_config_status(current_user)
     
     return render_template('dashboard.html', 
-                         stats=stats, 
+                         stats=payload['stats'], 
                          recent_activity=recent_activity,
                          recent_emails=recent_emails,
                          recent_meetings=recent_meetings,
                          config_status=config_status,
-                         weekly_emails=weekly_emails,
-                         weekly_meetings=weekly_meetings,
-                         weekly_tasks=weekly_tasks)
+                         weekly_emails=payload['weekly_emails'],
+                         weekly_meetings=payload['weekly_meetings'],
+                         weekly_tasks=payload['weekly_tasks'])
 
 
 @auth_bp.route('/settings', methods=['GET', 'POST'])
@@ -234,7 +379,11 @@ def settings():
             except ValueError:
                 pass
         
+        # Let the auto-join poller pick up the new settings on its next tick
+        current_user.bot_config.next_scan_at = None
+        
         db.session.commit()
+        invalidate_config_status(current_user.id)
         flash('Settings saved successfully!', 'success')
         return redirect(url_for('auth.settings'))
     
@@ -245,57 +394,35 @@ def settings():
 @login_required
 def test_clickup():
     """Test ClickUp API connection."""
-    import requests
-    
     if not current_user.settings or not current_user.settings.clickup_api_key:
         return {'success': False, 'message': 'ClickUp API key not configured'}
     
-    try:
-        headers = {'Authorization': current_user.settings.clickup_api_key}
-        resp = requests.get('https://api.clickup.com/api/v2/team', headers=headers, timeout=10)
+    api_key = current_user.settings.clickup_api_key
+    cache_key = f"clickup_teams:{hashlib.sha256(api_key.encode()).hexdigest()}"
+    teams = cache_get_json(cache_key)
+    
+    if teams is None:
+        try:
+            # Pooled keep-alive session shared with the agents' ClickUp calls
+            resp = limited_request('GET', 'https://api.clickup.com/api/v2/team',
+                                   headers={'Authorization': api_key}, timeout=10)
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
         
-        if resp.status_code == 200:
-            teams = resp.json().get('teams', [])
-            return {
-                'success': True, 
-                'message': f'Connected! Found {len(teams)} workspace(s).',
-                'teams': [{'id': t['id'], 'name': t['name']} for t in teams]
-            }
-        else:
+        if resp.status_code != 200:
             return {'success': False, 'message': f'API Error: {resp.status_code}'}
-    except Exception as e:
-        return {'success': False, 'message': str(e)}
+        
+        teams = [{'id': t['id'], 'name': t['name']} for t in resp.json().get('teams', [])]
+        cache_set_json(cache_key, teams, CLICKUP_TEAMS_TTL)
+    
+    return {
+        'success': True, 
+        'message': f'Connected! Found {len(teams)} workspace(s).',
+        'teams': teams
+    }
 
 
 # Microsoft OAuth Routes
-# Note: offline_access is automatically added by MSAL for device flow
-GRAPH_SCOPES = [
-    "User.Read",
-    "Mail.Read", 
-    "Mail.ReadWrite",  # For reading email attachments
-    "OnlineMeetings.Read",
-    "OnlineMeetingTranscript.Read.All",
-    "Calendars.Read",
-    "Chat.Read",
-    "Mail.Send",
-    "Files.Read.All",  # For OneDrive/SharePoint CV access
-    "Sites.Read.All"   # For SharePoint access
-]
-
-
-def get_msal_app(user_settings=None):
-    """Get MSAL application instance."""
-    client_id = os.getenv('AZURE_CLIENT_ID')
-    tenant_id = os.getenv('AZURE_TENANT_ID', 'common')
-    
-    if user_settings:
-        client_id = user_settings.azure_client_id or client_id
-        tenant_id = user_settings.azure_tenant_id or tenant_id
-    
-    return msal.PublicClientApplication(
-        client_id,
-        authority=f"https://login.microsoftonline.com/{tenant_id}"
-    )
 
 
 @auth_bp.route('/ms-login')
@@ -341,14 +468,17 @@ def ms_login_complete():
         
         if "access_token" in result:
             # Save tokens
+            forget_tokens(current_user.settings)
             current_user.settings.ms_access_token = result['access_token']
             if 'refresh_token' in result:
                 current_user.settings.ms_refresh_token = result['refresh_token']
             if 'expires_in' in result:
-                from datetime import timedelta
                 current_user.settings.ms_token_expires_at = datetime.utcnow() + timedelta(seconds=result['expires_in'])
+            if current_user.bot_config:
+                current_user.bot_config.next_scan_at = None
             
             db.session.commit()
+            invalidate_config_status(current_user.id)
             session.pop('ms_flow', None)
             
             flash('Microsoft account connected successfully!', 'success')
@@ -367,10 +497,12 @@ def ms_login_complete():
 def ms_disconnect():
     """Disconnect Microsoft account."""
     if current_user.settings:
+        forget_tokens(current_user.settings)
         current_user.settings._ms_access_token = None
         current_user.settings._ms_refresh_token = None
         current_user.settings.ms_token_expires_at = None
         db.session.commit()
+        invalidate_config_status(current_user.id)
     
     flash('Microsoft account disconnected.', 'info')
     return redirect(url_for('auth.settings'))
@@ -8,7 +8,7 @@ import sys
 # Add the current directory to Python path for module imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from celery import Celery
+from celery import Celery, group
 from celery.schedules import crontab
 
 # Initialize Celery
@@ -47,15 +47,35 @@ celery.conf.beat_schedule = {
         'task': 'celery_worker.scan_all_voice_bots',
         'schedule': 60.0,
     },
+    'refresh-expiring-ms-tokens-every-5-minutes': {
+        'task': 'celery_worker.refresh_expiring_tokens',
+        'schedule': 5 * 60,  # 5 minutes in seconds
+    },
+    'purge-old-logs-daily': {
+        'task': 'celery_worker.purge_old_logs',
+        'schedule': crontab(hour=3, minute=30),
+    },
 }
 
+# Retention for append-only log tables (activity_logs, ats_scan_history)
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '90'))
+
 # Import ATS tasks to register them with Celery
 import agents.ats_agent.tasks  # noqa: F401
 
 
 
+# Flask app shared by every task in this worker process (built on first use, so
+# each prefork child gets its own engine pool and runs create_all only once)
+_flask_app = None
+
+
 def get_flask_app():
-    """Create Flask app instance for Celery tasks."""
+    """Get or create the Flask app instance for Celery tasks."""
+    global _flask_app
+    if _flask_app is not None:
+        return _flask_app
+    
     from flask import Flask
     from flask_login import LoginManager
     from models import db, User
@@ -73,39 +93,42 @@ def get_flask_app():
     
     @login_manager.user_loader
     def load_user(user_id):
+        # One-to-one configs are joined-loaded by the User mapping
         return db.session.get(User, int(user_id))
     
     with app.app_context():
         db.create_all()
     
+    _flask_app = app
     return app
 
 
 @celery.task(bind=True)
 def scan_all_users_meetings(self):
     """Scan meetings for all enabled users."""
-    from models import db, MeetingAgentConfig
+    from models import db, UserSettings, MeetingAgentConfig
     
     app = get_flask_app()
     with app.app_context():
-        # Get all users with enabled meeting agent
-        enabled_configs = MeetingAgentConfig.query.filter_by(is_enabled=True).all()
+        # Users with the meeting agent enabled and configured. Credentials are
+        # checked for presence in SQL, so nothing is decrypted here; the
+        # per-user task decrypts only what it needs.
+        user_ids = db.session.scalars(
+            db.select(MeetingAgentConfig.user_id)
+            .join(UserSettings, UserSettings.user_id == MeetingAgentConfig.user_id)
+            .where(
+                MeetingAgentConfig.is_enabled.is_(True),
+                MeetingAgentConfig.clickup_list_id.isnot(None),
+                MeetingAgentConfig.clickup_list_id != '',
+                UserSettings._ms_access_token.isnot(None),
+                UserSettings._clickup_api_key.isnot(None),
+            )
+        ).all()
+        results = [f"Queued meeting scan for user {user_id}" for user_id in user_ids]
         
-        results = []
-        for config in enabled_configs:
-            user = config.user
-            
-            # Check if user has required settings
-            if not user.settings or not user.settings.ms_access_token:
-                continue
-            if not config.clickup_list_id:
-                continue
-            if not user.settings.clickup_api_key:
-                continue
-            
-            # Queue individual user scan
-            scan_user_meetings.delay(user.id)
-            results.append(f"Queued meeting scan for user {user.id}")
+        # Queue individual user scans as one group (single producer checkout)
+        if user_ids:
+            group(scan_user_meetings.s(user_id) for user_id in user_ids).apply_async()
         
         return {'users_queued': len(results), 'details': results}
 
@@ -114,6 +137,7 @@ def scan_all_users_meetings(self):
 def scan_user_meetings(self, user_id):
     """Scan meetings for a specific user."""
     from models import db, User, ActivityLog
+    from auth.routes import invalidate_dashboard
     from agents.meeting_agent.service import MeetingAgentService
     import asyncio
     
@@ -137,6 +161,7 @@ def scan_user_meetings(self, user_id):
             )
             db.session.add(log)
             db.session.commit()
+            invalidate_dashboard(user.id)
             
             return result
             
@@ -159,28 +184,29 @@ def scan_user_meetings(self, user_id):
 @celery.task(bind=True)
 def scan_all_users_emails(self):
     """Scan emails for all enabled users."""
-    from models import db, EmailAgentConfig
+    from models import db, UserSettings, EmailAgentConfig
     
     app = get_flask_app()
     with app.app_context():
-        # Get all users with enabled email agent
-        enabled_configs = EmailAgentConfig.query.filter_by(is_enabled=True).all()
+        # Users with the email agent enabled and configured. Credentials are
+        # checked for presence in SQL, so nothing is decrypted here; the
+        # per-user task decrypts only what it needs.
+        user_ids = db.session.scalars(
+            db.select(EmailAgentConfig.user_id)
+            .join(UserSettings, UserSettings.user_id == EmailAgentConfig.user_id)
+            .where(
+                EmailAgentConfig.is_enabled.is_(True),
+                EmailAgentConfig.clickup_list_id.isnot(None),
+                EmailAgentConfig.clickup_list_id != '',
+                UserSettings._ms_access_token.isnot(None),
+                UserSettings._clickup_api_key.isnot(None),
+            )
+        ).all()
+        results = [f"Queued email scan for user {user_id}" for user_id in user_ids]
         
-        results = []
-        for config in enabled_configs:
-            user = config.user
-            
-            # Check if user has required settings
-            if not user.settings or not user.settings.ms_access_token:
-                continue
-            if not config.clickup_list_id:
-                continue
-            if not user.settings.clickup_api_key:
-                continue
-            
-            # Queue individual user scan
-            scan_user_emails.delay(user.id)
-            results.append(f"Queued email scan for user {user.id}")
+        # Queue individual user scans as one group (single producer checkout)
+        if user_ids:
+            group(scan_user_emails.s(user_id) for user_id in user_ids).apply_async()
         
         return {'users_queued': len(results), 'details': results}
 
@@ -189,6 +215,7 @@ def scan_all_users_emails(self):
 def scan_user_emails(self, user_id):
     """Scan emails for a specific user."""
     from models import db, User, ActivityLog
+    from auth.routes import invalidate_dashboard
     from agents.email_agent.service import EmailAgentService
     import asyncio
     
@@ -212,6 +239,7 @@ def scan_user_emails(self, user_id):
             )
             db.session.add(log)
             db.session.commit()
+            invalidate_dashboard(user.id)
             
             return result
             
@@ -236,6 +264,7 @@ def scan_user_emails(self, user_id):
 def process_new_email_notification(self, user_id, email_id):
     """Process a single incoming email (triggered by webhook)."""
     from models import db, User, ActivityLog
+    from auth.routes import invalidate_dashboard
     from agents.email_agent.service import EmailAgentService
     import asyncio
     
@@ -260,6 +289,7 @@ def process_new_email_notification(self, user_id, email_id):
                 )
                 db.session.add(log)
                 db.session.commit()
+                invalidate_dashboard(user.id)
             
             return result
             
@@ -270,18 +300,79 @@ def process_new_email_notification(self, user_id, email_id):
 @celery.task(bind=True)
 def scan_all_voice_bots(self):
     """Scan upcoming meetings for voice bots (Auto-Join)."""
-    from models import db, User
+    from datetime import datetime
+    from models import db, BotConfig
     from agents.voice_bot_agent.scheduler import check_and_join_meetings
     
     app = get_flask_app()
     with app.app_context():
-        users = User.query.all()
+        # Only users with an enabled bot that are due for a check
+        user_ids = db.session.scalars(
+            db.select(BotConfig.user_id).where(
+                BotConfig.is_enabled.is_(True),
+                db.or_(BotConfig.next_scan_at.is_(None), BotConfig.next_scan_at <= datetime.utcnow())
+            )
+        ).all()
         results = []
-        for user in users:
-            if user.bot_config and user.bot_config.is_enabled:
-               try:
-                   check_and_join_meetings(user.id)
-                   results.append(f"Checked user {user.id}")
-               except Exception as e:
-                   results.append(f"Error checking user {user.id}: {e}")
+        for user_id in user_ids:
+            try:
+                check_and_join_meetings(user_id)
+                results.append(f"Checked user {user_id}")
+            except Exception as e:
+                results.append(f"Error checking user {user_id}: {e}")
         return results
+
+
+@celery.task(ignore_result=True)
+def touch_last_login(user_id, ts_iso):
+    """Record a user's last login time (queued from the login view)."""
+    from datetime import datetime
+    from models import db, User
+    
+    app = get_flask_app()
+    with app.app_context():
+        db.session.execute(
+            db.update(User).where(User.id == user_id)
+            .values(last_login=datetime.fromisoformat(ts_iso))
+        )
+        db.session.commit()
+
+
+@celery.task(ignore_result=True)
+def refresh_expiring_tokens():
+    """Refresh Microsoft tokens expiring before the next sweep, so scans start with a valid token."""
+    from models import db
+    from utils.ms_auth import PREFETCH_WINDOW, find_users_expiring_soon, refresh_many
+    
+    app = get_flask_app()
+    with app.app_context():
+        # The window is longer than the sweep interval, so each token is caught before it expires
+        within = int(PREFETCH_WINDOW.total_seconds())
+        results = refresh_many(find_users_expiring_soon(db, within), db)
+        return {'refreshed': sum(results.values()), 'failed': len(results) - sum(results.values())}
+
+
+@celery.task(ignore_result=True)
+def purge_old_logs(batch_size=5000):
+    """Delete activity logs and ATS scan history older than LOG_RETENTION_DAYS, in batches."""
+    from datetime import datetime, timedelta
+    from models import db, ActivityLog, ATSScanHistory
+    
+    cutoff = datetime.utcnow() - timedelta(days=LOG_RETENTION_DAYS)
+    
+    app = get_flask_app()
+    with app.app_context():
+        deleted = {}
+        for model, column in ((ActivityLog, ActivityLog.created_at),
+                              (ATSScanHistory, ATSScanHistory.scan_started_at)):
+            total = 0
+            while True:
+                # Short batches keep each transaction's locks brief on the live table
+                ids = db.select(model.id).where(column < cutoff).limit(batch_size)
+                count = db.session.execute(db.delete(model).where(model.id.in_(ids))).rowcount
+                db.session.commit()
+                total += count
+                if count < batch_size:
+                    break
+            deleted[model.__tablename__] = total
+        return deleted
@@ -15,6 +15,20 @@ class Config:
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool: keep warm connections to the remote database, check them
+    # before use and recycle before Railway's proxy drops idle ones
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+    if not DATABASE_URL.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+            # Timestamp columns default to now() server-side; keep them UTC like datetime.utcnow()
+            'connect_args': {'options': '-c timezone=utc'},
+        })
+    
     # Redis for Celery
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     CELERY_BROKER_URL = REDIS_URL
@@ -57,6 +71,11 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     
+    # N+1 detection (pip install nplusone): raise on lazy loads inside loops.
+    # The user loader eager-loads every config on purpose, so skip those.
+    NPLUSONE_RAISE = True
+    NPLUSONE_WHITELIST = [{'label': 'unused_eager_load', 'model': 'User'}]
+    
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -2,48 +2,195 @@
 Database Models for Unified AI Agents Application
 """
 from datetime import datetime
+from functools import lru_cache
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from dotenv import load_dotenv
+import base64
+import hashlib
 import os
-import json
+import time
+import orjson
+
+# Argon2 (C implementation) for password hashing; werkzeug's hashes are still verified
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerifyMismatchError, InvalidHashError
+    _password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+except ImportError:
+    _password_hasher = None
 
 # Load .env file to ensure ENCRYPTION_KEY is available
 load_dotenv(override=True)
 
 db = SQLAlchemy()
 
+# JSON list columns: native JSONB on PostgreSQL, JSON-as-TEXT elsewhere (SQLite dev).
+# The driver decodes them once at load time instead of on every property read.
+JSONList = db.JSON().with_variant(JSONB(), 'postgresql')
 
-def get_cipher():
-    """Get Fernet cipher for encryption/decryption."""
-    key = os.getenv('ENCRYPTION_KEY', '').strip()
+
+# Default values for JSON list columns (copied per row so rows never share a list)
+DEFAULT_IGNORE_SUBJECT_PREFIXES = ("Automatic reply:", "Accepted:", "Declined:", "Tentative:", "Canceled:")
+DEFAULT_STANDUP_KEYWORDS = ("Daily Standup", "Stand-up", "Standup")
+DEFAULT_WAKE_WORDS = ("hello Alex", "hey Alex", "Alex")
+DEFAULT_DISMISSAL_PHRASES = ("that's all", "thanks Alex", "goodbye", "bye")
+
+
+def _json_list(instance, attr):
+    """Read a JSON list column as a fresh list (callers may mutate it)."""
+    value = getattr(instance, attr)
+    if not value:
+        return []
+    if isinstance(value, str):
+        # Legacy TEXT column not yet converted by scripts/migrate_db.py
+        value = orjson.loads(value)
+    return list(value)
+
+
+def _set_json_list(instance, attr, value):
+    """Store a list into a JSON list column (a new list, so the ORM sees the change)."""
+    setattr(instance, attr, list(value) if isinstance(value, list) else [])
+
+
+@lru_cache(maxsize=1)
+def _encryption_key():
+    """ENCRYPTION_KEY as bytes (a Fernet key: urlsafe base64 of 32 random bytes)."""
+    key = os.getenv('ENCRYPTION_KEY', '').strip().encode()
     if not key:
         # Generate a key for development (not secure for production)
-        key = Fernet.generate_key().decode()
-    return Fernet(key.encode() if isinstance(key, str) else key)
+        key = Fernet.generate_key()
+    return key
+
+
+@lru_cache(maxsize=1)
+def get_cipher():
+    """
+    Get Fernet cipher for encryption/decryption.
+    Only used to read legacy values written before the switch to AES-GCM.
+    """
+    return Fernet(_encryption_key())
+
+
+# HKDF label for the AES-GCM key, so it never equals the key bytes Fernet uses
+_AEAD_KEY_INFO = b'unified-app secret columns aes-256-gcm v2'
+
+
+@lru_cache(maxsize=1)
+def _get_aead():
+    """AES-256-GCM cipher keyed by an HKDF-SHA256 derivation of ENCRYPTION_KEY."""
+    key = HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=_AEAD_KEY_INFO
+    ).derive(base64.urlsafe_b64decode(_encryption_key()))
+    return AESGCM(key)
+
+
+# Prefix marking AES-GCM values; legacy Fernet tokens always start with 'gAAAAA'
+_AEAD_PREFIX = 'g2:'
+_NONCE_SIZE = 12
 
 
 def encrypt_value(value):
-    """Encrypt a string value."""
+    """Encrypt a string value (AES-GCM, stored as prefixed urlsafe base64 text)."""
     if not value:
         return None
-    cipher = get_cipher()
-    return cipher.encrypt(value.encode()).decode()
+    nonce = os.urandom(_NONCE_SIZE)
+    sealed = nonce + _get_aead().encrypt(nonce, value.encode(), None)
+    return _AEAD_PREFIX + base64.urlsafe_b64encode(sealed).decode()
 
 
 def decrypt_value(encrypted_value):
-    """Decrypt an encrypted string value."""
+    """Decrypt an encrypted string value (AES-GCM, or legacy Fernet)."""
     if not encrypted_value:
         return None
     try:
-        cipher = get_cipher()
-        return cipher.decrypt(encrypted_value.encode()).decode()
+        if encrypted_value.startswith(_AEAD_PREFIX):
+            sealed = base64.urlsafe_b64decode(encrypted_value[len(_AEAD_PREFIX):])
+            return _get_aead().decrypt(sealed[:_NONCE_SIZE], sealed[_NONCE_SIZE:], None).decode()
+        return get_cipher().decrypt(encrypted_value.encode()).decode()
     except Exception:
         return None
 
 
+# Recently failed password checks: keyed digest of (stored hash, guess) -> expiry (monotonic).
+# Repeating an identical wrong guess skips the deliberately slow hash; keying the digest
+# with a per-process secret keeps the entries useless for offline guessing.
+FAILED_CHECK_TTL = 300
+_FAILED_CHECK_MAX = 4096
+_failed_check_key = os.urandom(32)
+_failed_checks = {}
+
+
+def _failed_check_digest(password_hash, password):
+    return hashlib.blake2b(
+        f"{password_hash}\0{password}".encode(), key=_failed_check_key, digest_size=16
+    ).digest()
+
+
+def _remember_failed_check(digest):
+    now = time.monotonic()
+    if len(_failed_checks) >= _FAILED_CHECK_MAX:
+        for key in [k for k, expires in _failed_checks.items() if expires <= now]:
+            del _failed_checks[key]
+        if len(_failed_checks) >= _FAILED_CHECK_MAX:
+            _failed_checks.clear()
+    _failed_checks[digest] = now + FAILED_CHECK_TTL
+
+
+def _insert_ignore(model, conflict_columns, values):
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING id in a single statement.
+    Returns the new row id, or None if a row with the same key already exists.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(model)
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(model)
+    else:
+        row = model(**values)
+        db.session.add(row)
+        db.session.flush()
+        return row.id
+    
+    stmt = stmt.values(**values).on_conflict_do_nothing(index_elements=conflict_columns)
+    return db.session.execute(stmt.returning(model.id)).scalar()
+
+
+class EncryptedField:
+    """
+    Plaintext view of an encrypted column, e.g. ms_access_token = EncryptedField('_ms_access_token').
+    The decrypted value is memoized on the instance against the stored ciphertext, so
+    repeated reads decrypt once and direct writes to the column are picked up.
+    """
+    
+    def __init__(self, column_attr):
+        self.column_attr = column_attr
+        self.cache_key = f'_plain{column_attr}'
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        raw = getattr(instance, self.column_attr)
+        cached = instance.__dict__.get(self.cache_key)
+        if cached is None or cached[0] != raw:
+            cached = (raw, decrypt_value(raw))
+            instance.__dict__[self.cache_key] = cached
+        return cached[1]
+    
+    def __set__(self, instance, value):
+        raw = encrypt_value(value)
+        setattr(instance, self.column_attr, raw)
+        instance.__dict__[self.cache_key] = (raw, value if raw else None)
+
+
 class User(UserMixin, db.Model):
     """User model for authentication."""
     __tablename__ = 'users'
@@ -52,24 +199,60 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     name = db.Column(db.String(100), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     last_login = db.Column(db.DateTime, nullable=True)
     
     # Relationships
-    settings = db.relationship('UserSettings', backref='user', uselist=False, cascade='all, delete-orphan')
-    email_config = db.relationship('EmailAgentConfig', backref='user', uselist=False, cascade='all, delete-orphan')
-    meeting_config = db.relationship('MeetingAgentConfig', backref='user', uselist=False, cascade='all, delete-orphan')
-    bot_config = db.relationship('BotConfig', backref='user', uselist=False, cascade='all, delete-orphan')
-    ats_config = db.relationship('ATSAgentConfig', backref='user', uselist=False, cascade='all, delete-orphan')
-    processed_emails = db.relationship('ProcessedEmail', backref='user', lazy='dynamic', cascade='all, delete-orphan')
-    processed_meetings = db.relationship('ProcessedMeeting', backref='user', lazy='dynamic', cascade='all, delete-orphan')
-    cv_candidates = db.relationship('CVCandidate', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    # One-to-one configs are read together on nearly every page and task, so load them in the user's SELECT
+    settings = db.relationship('UserSettings', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
+    email_config = db.relationship('EmailAgentConfig', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
+    meeting_config = db.relationship('MeetingAgentConfig', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
+    bot_config = db.relationship('BotConfig', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
+    ats_config = db.relationship('ATSAgentConfig', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
+    # Bulk collections: never iterated through the relationship (list views use the
+    # indexed for_user() queries below); kept for delete cascades
+    processed_emails = db.relationship('ProcessedEmail', backref='user', cascade='all, delete-orphan')
+    processed_meetings = db.relationship('ProcessedMeeting', backref='user', cascade='all, delete-orphan')
+    cv_candidates = db.relationship('CVCandidate', backref='user', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        if _password_hasher:
+            self.password_hash = _password_hasher.hash(password)
+        else:
+            self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        Verify a password against an Argon2 or legacy werkzeug (pbkdf2/scrypt) hash.
+        Legacy or outdated hashes are upgraded in place on success; the caller commits.
+        A guess that just failed against the same hash is rejected without re-hashing.
+        """
+        digest = _failed_check_digest(self.password_hash, password)
+        if _failed_checks.get(digest, 0) > time.monotonic():
+            return False
+        
+        if self._verify_password(password):
+            return True
+        _remember_failed_check(digest)
+        return False
+    
+    def _verify_password(self, password):
+        if self.password_hash.startswith('$argon2'):
+            if not _password_hasher:
+                return False
+            try:
+                _password_hasher.verify(self.password_hash, password)
+            except (VerifyMismatchError, InvalidHashError):
+                return False
+            if _password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+        
+        if not check_password_hash(self.password_hash, password):
+            return False
+        if _password_hasher:
+            self.set_password(password)
+        return True
     
     def __repr__(self):
         return f'<User {self.email}>'
@@ -95,39 +278,19 @@ class UserSettings(db.Model):
     # OpenAI API key (encrypted, optional - uses app default if not set)
     _openai_api_key = db.Column('openai_api_key', db.String(512), nullable=True)
     
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    @property
-    def clickup_api_key(self):
-        return decrypt_value(self._clickup_api_key)
-    
-    @clickup_api_key.setter
-    def clickup_api_key(self, value):
-        self._clickup_api_key = encrypt_value(value)
-    
-    @property
-    def openai_api_key(self):
-        return decrypt_value(self._openai_api_key)
-    
-    @openai_api_key.setter
-    def openai_api_key(self, value):
-        self._openai_api_key = encrypt_value(value)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=db.func.now())
     
-    @property
-    def ms_access_token(self):
-        return decrypt_value(self._ms_access_token)
-    
-    @ms_access_token.setter
-    def ms_access_token(self, value):
-        self._ms_access_token = encrypt_value(value)
-    
-    @property
-    def ms_refresh_token(self):
-        return decrypt_value(self._ms_refresh_token)
+    __table_args__ = (
+        # Partial: token refresh sweeps only look at rows that can be refreshed
+        db.Index('ix_user_settings_ms_expires', 'ms_token_expires_at',
+                 postgresql_where=db.text('ms_refresh_token IS NOT NULL'),
+                 sqlite_where=db.text('ms_refresh_token IS NOT NULL')),
+    )
     
-    @ms_refresh_token.setter
-    def ms_refresh_token(self, value):
-        self._ms_refresh_token = encrypt_value(value)
+    clickup_api_key = EncryptedField('_clickup_api_key')
+    openai_api_key = EncryptedField('_openai_api_key')
+    ms_access_token = EncryptedField('_ms_access_token')
+    ms_refresh_token = EncryptedField('_ms_refresh_token')
 
 
 class EmailAgentConfig(db.Model):
@@ -141,50 +304,50 @@ class EmailAgentConfig(db.Model):
     clickup_list_id = db.Column(db.String(50), nullable=True)
     
     # Filters (stored as JSON)
-    _allowed_senders = db.Column('allowed_senders', db.Text, default='[]')
-    _allowed_assignees = db.Column('allowed_assignees', db.Text, default='[]')
-    _sensitive_keywords = db.Column('sensitive_keywords', db.Text, default='[]')
-    _ignore_subject_prefixes = db.Column('ignore_subject_prefixes', db.Text, 
-                                         default='["Automatic reply:", "Accepted:", "Declined:", "Tentative:", "Canceled:"]')
+    _allowed_senders = db.Column('allowed_senders', JSONList, default=list)
+    _allowed_assignees = db.Column('allowed_assignees', JSONList, default=list)
+    _sensitive_keywords = db.Column('sensitive_keywords', JSONList, default=list)
+    _ignore_subject_prefixes = db.Column('ignore_subject_prefixes', JSONList, 
+                                         default=lambda: list(DEFAULT_IGNORE_SUBJECT_PREFIXES))
     
     # Agent settings
     is_enabled = db.Column(db.Boolean, default=True)
     auto_run_interval = db.Column(db.Integer, default=0)  # 0 = manual only, otherwise minutes
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=db.func.now())
     
     @property
     def allowed_senders(self):
-        return json.loads(self._allowed_senders or '[]')
+        return _json_list(self, '_allowed_senders')
     
     @allowed_senders.setter
     def allowed_senders(self, value):
-        self._allowed_senders = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_allowed_senders', value)
     
     @property
     def allowed_assignees(self):
-        return json.loads(self._allowed_assignees or '[]')
+        return _json_list(self, '_allowed_assignees')
     
     @allowed_assignees.setter
     def allowed_assignees(self, value):
-        self._allowed_assignees = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_allowed_assignees', value)
     
     @property
     def sensitive_keywords(self):
-        return json.loads(self._sensitive_keywords or '[]')
+        return _json_list(self, '_sensitive_keywords')
     
     @sensitive_keywords.setter
     def sensitive_keywords(self, value):
-        self._sensitive_keywords = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_sensitive_keywords', value)
     
     @property
     def ignore_subject_prefixes(self):
-        return json.loads(self._ignore_subject_prefixes or '[]')
+        return _json_list(self, '_ignore_subject_prefixes')
     
     @ignore_subject_prefixes.setter
     def ignore_subject_prefixes(self, value):
-        self._ignore_subject_prefixes = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_ignore_subject_prefixes', value)
 
 
 class MeetingAgentConfig(db.Model):
@@ -199,46 +362,51 @@ class MeetingAgentConfig(db.Model):
     target_space_id = db.Column(db.String(50), nullable=True)
     target_doc_name = db.Column(db.String(200), default='Daily Standup Summary By AI')
     
+    # Resolved ClickUp IDs for the standup doc (cleared when target changes)
+    cached_workspace_id = db.Column(db.String(50), nullable=True)
+    cached_doc_id = db.Column(db.String(100), nullable=True)
+    cached_page_id = db.Column(db.String(100), nullable=True)
+    
     # Email alerts
     helpdesk_email = db.Column(db.String(120), nullable=True)
     
     # Meeting filters (stored as JSON)
-    _meeting_name_filters = db.Column('meeting_name_filters', db.Text, default='[]')
-    _standup_meeting_keywords = db.Column('standup_meeting_keywords', db.Text, 
-                                          default='["Daily Standup", "Stand-up", "Standup"]')
-    _excluded_meeting_names = db.Column('excluded_meeting_names', db.Text, default='[]')
+    _meeting_name_filters = db.Column('meeting_name_filters', JSONList, default=list)
+    _standup_meeting_keywords = db.Column('standup_meeting_keywords', JSONList, 
+                                          default=lambda: list(DEFAULT_STANDUP_KEYWORDS))
+    _excluded_meeting_names = db.Column('excluded_meeting_names', JSONList, default=list)
     
     # Agent settings
     is_enabled = db.Column(db.Boolean, default=True)
     auto_run_interval = db.Column(db.Integer, default=0)
     scan_days_back = db.Column(db.Integer, default=2)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=db.func.now())
     
     @property
     def meeting_name_filters(self):
-        return json.loads(self._meeting_name_filters or '[]')
+        return _json_list(self, '_meeting_name_filters')
     
     @meeting_name_filters.setter
     def meeting_name_filters(self, value):
-        self._meeting_name_filters = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_meeting_name_filters', value)
     
     @property
     def standup_meeting_keywords(self):
-        return json.loads(self._standup_meeting_keywords or '[]')
+        return _json_list(self, '_standup_meeting_keywords')
     
     @standup_meeting_keywords.setter
     def standup_meeting_keywords(self, value):
-        self._standup_meeting_keywords = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_standup_meeting_keywords', value)
     
     @property
     def excluded_meeting_names(self):
-        return json.loads(self._excluded_meeting_names or '[]')
+        return _json_list(self, '_excluded_meeting_names')
     
     @excluded_meeting_names.setter
     def excluded_meeting_names(self, value):
-        self._excluded_meeting_names = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_excluded_meeting_names', value)
 
 
 class BotConfig(db.Model):
@@ -250,9 +418,9 @@ class BotConfig(db.Model):
     
     # Bot personality
     bot_name = db.Column(db.String(50), default='Alex')
-    _wake_words = db.Column('wake_words', db.Text, default='["hello Alex", "hey Alex", "Alex"]')
-    _dismissal_phrases = db.Column('dismissal_phrases', db.Text, 
-                                   default='["that\'s all", "thanks Alex", "goodbye", "bye"]')
+    _wake_words = db.Column('wake_words', JSONList, default=lambda: list(DEFAULT_WAKE_WORDS))
+    _dismissal_phrases = db.Column('dismissal_phrases', JSONList, 
+                                   default=lambda: list(DEFAULT_DISMISSAL_PHRASES))
     
     # ClickUp context
     clickup_space_name = db.Column(db.String(100), default='AI Context')
@@ -270,41 +438,29 @@ class BotConfig(db.Model):
     # Settings
     is_enabled = db.Column(db.Boolean, default=True)
     timeout_seconds = db.Column(db.Integer, default=50)
+    next_scan_at = db.Column(db.DateTime, nullable=True)  # When the auto-join poller should next check this user
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=db.func.now())
     
     @property
     def wake_words(self):
-        return json.loads(self._wake_words or '[]')
+        return _json_list(self, '_wake_words')
     
     @wake_words.setter
     def wake_words(self, value):
-        self._wake_words = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_wake_words', value)
     
     @property
     def dismissal_phrases(self):
-        return json.loads(self._dismissal_phrases or '[]')
+        return _json_list(self, '_dismissal_phrases')
     
     @dismissal_phrases.setter
     def dismissal_phrases(self, value):
-        self._dismissal_phrases = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_dismissal_phrases', value)
     
-    @property
-    def recall_ai_token(self):
-        return decrypt_value(self._recall_ai_token)
-    
-    @recall_ai_token.setter
-    def recall_ai_token(self, value):
-        self._recall_ai_token = encrypt_value(value)
-    
-    @property
-    def deepgram_api_key(self):
-        return decrypt_value(self._deepgram_api_key)
-    
-    @deepgram_api_key.setter
-    def deepgram_api_key(self, value):
-        self._deepgram_api_key = encrypt_value(value)
+    recall_ai_token = EncryptedField('_recall_ai_token')
+    deepgram_api_key = EncryptedField('_deepgram_api_key')
 
 
 class ProcessedEmail(db.Model):
@@ -317,11 +473,25 @@ class ProcessedEmail(db.Model):
     subject = db.Column(db.String(500), nullable=True)
     sender = db.Column(db.String(200), nullable=True)
     tasks_created = db.Column(db.Integer, default=0)
-    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'email_id', name='unique_user_email'),
+        db.Index('ix_processed_emails_user_time', 'user_id', 'processed_at'),
     )
+    
+    @classmethod
+    def insert_ignore(cls, **values):
+        """Record a processed item unless (user_id, email_id) is already logged; returns the id or None."""
+        return _insert_ignore(cls, ['user_id', 'email_id'], values)
+    
+    @classmethod
+    def for_user(cls, user_id, since=None):
+        """Newest-first query of a user's rows (served by the (user_id, processed_at) index)."""
+        query = cls.query.filter(cls.user_id == user_id)
+        if since is not None:
+            query = query.filter(cls.processed_at >= since)
+        return query.order_by(cls.processed_at.desc())
 
 
 class ProcessedMeeting(db.Model):
@@ -334,11 +504,25 @@ class ProcessedMeeting(db.Model):
     meeting_subject = db.Column(db.String(500), nullable=True)
     tasks_created = db.Column(db.Integer, default=0)
     standup_summary_created = db.Column(db.Boolean, default=False)
-    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'transcript_id', name='unique_user_transcript'),
+        db.Index('ix_processed_meetings_user_time', 'user_id', 'processed_at'),
     )
+    
+    @classmethod
+    def insert_ignore(cls, **values):
+        """Record a processed item unless (user_id, transcript_id) is already logged; returns the id or None."""
+        return _insert_ignore(cls, ['user_id', 'transcript_id'], values)
+    
+    @classmethod
+    def for_user(cls, user_id, since=None):
+        """Newest-first query of a user's rows (served by the (user_id, processed_at) index)."""
+        query = cls.query.filter(cls.user_id == user_id)
+        if since is not None:
+            query = query.filter(cls.processed_at >= since)
+        return query.order_by(cls.processed_at.desc())
 
 
 class ActivityLog(db.Model):
@@ -351,9 +535,21 @@ class ActivityLog(db.Model):
     action = db.Column(db.String(50), nullable=False)
     message = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(20), default='success')  # 'success', 'error', 'warning'
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
-    user = db.relationship('User', backref=db.backref('activity_logs', lazy='dynamic'))
+    user = db.relationship('User', backref='activity_logs')
+    
+    __table_args__ = (
+        db.Index('ix_activity_logs_user_created', 'user_id', 'created_at'),
+    )
+    
+    @classmethod
+    def for_user(cls, user_id, agent_type=None):
+        """Newest-first query of a user's logs (served by the (user_id, created_at) index)."""
+        query = cls.query.filter(cls.user_id == user_id)
+        if agent_type:
+            query = query.filter(cls.agent_type == agent_type)
+        return query.order_by(cls.created_at.desc())
 
 
 class ATSAgentConfig(db.Model):
@@ -366,14 +562,14 @@ class ATSAgentConfig(db.Model):
     # Job Details
     job_title = db.Column(db.String(255), nullable=True)
     job_description = db.Column(db.Text, nullable=True)
-    _required_skills = db.Column('required_skills', db.Text, default='[]')
+    _required_skills = db.Column('required_skills', JSONList, default=list)
     
     # Filters
-    _allowed_locations = db.Column('allowed_locations', db.Text, default='[]')
+    _allowed_locations = db.Column('allowed_locations', JSONList, default=list)
     min_experience = db.Column(db.Integer, default=0)
     max_experience = db.Column(db.Integer, default=99)
     min_education_level = db.Column(db.String(50), nullable=True)  # Bachelors, Masters, etc.
-    _must_have_skills = db.Column('must_have_skills', db.Text, default='[]')
+    _must_have_skills = db.Column('must_have_skills', JSONList, default=list)
     
     # Scoring Weights (must sum to 1.0)
     weight_skills = db.Column(db.Numeric(4, 2), default=0.40)
@@ -401,32 +597,32 @@ class ATSAgentConfig(db.Model):
     # Agent settings
     is_enabled = db.Column(db.Boolean, default=True)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=db.func.now())
     
     @property
     def required_skills(self):
-        return json.loads(self._required_skills or '[]')
+        return _json_list(self, '_required_skills')
     
     @required_skills.setter
     def required_skills(self, value):
-        self._required_skills = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_required_skills', value)
     
     @property
     def allowed_locations(self):
-        return json.loads(self._allowed_locations or '[]')
+        return _json_list(self, '_allowed_locations')
     
     @allowed_locations.setter
     def allowed_locations(self, value):
-        self._allowed_locations = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_allowed_locations', value)
     
     @property
     def must_have_skills(self):
-        return json.loads(self._must_have_skills or '[]')
+        return _json_list(self, '_must_have_skills')
     
     @must_have_skills.setter
     def must_have_skills(self, value):
-        self._must_have_skills = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_must_have_skills', value)
 
 
 class CVCandidate(db.Model):
@@ -446,12 +642,13 @@ class CVCandidate(db.Model):
     
     # Extracted Data
     years_of_experience = db.Column(db.Numeric(4, 1), nullable=True)
-    _skills = db.Column('skills', db.Text, default='[]')
+    _skills = db.Column('skills', JSONList, default=list)
     education_level = db.Column(db.String(50), nullable=True)
     current_job_title = db.Column(db.String(255), nullable=True)
     
     # CV Data
-    cv_text = db.Column(db.Text, nullable=True)  # Full extracted text
+    # Full extracted text (5-50 KB); deferred so candidate lists don't fetch it. Use undefer('cv_text') when needed
+    cv_text = db.deferred(db.Column(db.Text, nullable=True))
     cv_file_path = db.Column(db.String(500), nullable=True)  # Stored file location
     cv_source = db.Column(db.String(50), nullable=True)  # 'google_drive', 'sharepoint', 'outlook', 'email'
     source_file_id = db.Column(db.String(500), nullable=True)  # Original file ID from source (Microsoft Graph IDs can be 380+ chars)
@@ -471,31 +668,33 @@ class CVCandidate(db.Model):
     keywords_reasoning = db.Column(db.Text, nullable=True)
     final_weighted_score = db.Column(db.Numeric(5, 2), nullable=True)
     overall_assessment = db.Column(db.Text, nullable=True)
-    _red_flags = db.Column('red_flags', db.Text, default='[]')
+    _red_flags = db.Column('red_flags', JSONList, default=list)
     
     # Metadata
     processed_at = db.Column(db.DateTime, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'source_file_id', name='unique_user_cv'),
+        db.Index('ix_cv_candidates_user_status_score', 'user_id', 'status', 'final_weighted_score'),
+        db.Index('ix_cv_candidates_user_email', 'user_id', 'email'),
     )
     
     @property
     def skills(self):
-        return json.loads(self._skills or '[]')
+        return _json_list(self, '_skills')
     
     @skills.setter
     def skills(self, value):
-        self._skills = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_skills', value)
     
     @property
     def red_flags(self):
-        return json.loads(self._red_flags or '[]')
+        return _json_list(self, '_red_flags')
     
     @red_flags.setter
     def red_flags(self, value):
-        self._red_flags = json.dumps(value if isinstance(value, list) else [])
+        _set_json_list(self, '_red_flags', value)
 
 
 class ATSScanHistory(db.Model):
@@ -511,9 +710,13 @@ class ATSScanHistory(db.Model):
     cvs_scored = db.Column(db.Integer, default=0)
     top_candidates_count = db.Column(db.Integer, default=0)
     
-    scan_started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    scan_started_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     scan_completed_at = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(50), default='running')  # 'running', 'completed', 'failed'
     error_message = db.Column(db.Text, nullable=True)
     
-    user = db.relationship('User', backref=db.backref('ats_scan_history', lazy='dynamic'))
+    user = db.relationship('User', backref='ats_scan_history')
+    
+    __table_args__ = (
+        db.Index('ix_ats_scan_history_user_started', 'user_id', 'scan_started_at'),
+    )
@@ -5,6 +5,30 @@ Connects directly to PostgreSQL and fixes column size
 import os
 import psycopg2
 
+# Check-and-alter in one server-side block: a single round trip, and a no-op
+# when the column is already VARCHAR(500) or the table doesn't exist yet
+FIX_SOURCE_FILE_ID_SQL = """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'cv_candidates'
+        AND column_name = 'source_file_id'
+        AND character_maximum_length IS DISTINCT FROM 500
+    ) THEN
+        ALTER TABLE cv_candidates ALTER COLUMN source_file_id TYPE VARCHAR(500);
+    END IF;
+END $$;
+"""
+
+SOURCE_FILE_ID_LENGTH_SQL = """
+SELECT character_maximum_length 
+FROM information_schema.columns 
+WHERE table_name = 'cv_candidates' 
+AND column_name = 'source_file_id';
+"""
+
+
 def fix_postgres_column():
     """Connect directly to PostgreSQL and fix source_file_id column."""
     # Get PostgreSQL URL from environment
@@ -23,16 +47,15 @@ def fix_postgres_column():
         conn = psycopg2.connect(database_url)
         cursor = conn.cursor()
         
-        # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT 1 FROM information_schema.tables 
-                WHERE table_name = 'cv_candidates'
-            );
-        """)
-        table_exists = cursor.fetchone()[0]
+        cursor.execute(FIX_SOURCE_FILE_ID_SQL)
+        conn.commit()
+        
+        cursor.execute(SOURCE_FILE_ID_LENGTH_SQL)
+        result = cursor.fetchone()
+        cursor.close()
+        conn.close()
         
-        if not table_exists:
+        if not result:
             print("⚠️  Table 'cv_candidates' doesn't exist yet. Creating tables...")
             # Import and run db.create_all()
             from app import create_app
@@ -41,52 +64,9 @@ def fix_postgres_column():
             with app.app_context():
                 db.create_all()
             print("✅ Tables created!")
-            conn.close()
             return
         
-        # Check current column size
-        cursor.execute("""
-            SELECT character_maximum_length 
-            FROM information_schema.columns 
-            WHERE table_name = 'cv_candidates' 
-            AND column_name = 'source_file_id';
-        """)
-        
-        result = cursor.fetchone()
-        if result:
-            current_length = result[0]
-            print(f"Current source_file_id length: {current_length}")
-            
-            if current_length == 500:
-                print("✅ Column is already the correct size (500)!")
-                conn.close()
-                return
-            
-            # Alter the column
-            print("Altering source_file_id column to VARCHAR(500)...")
-            cursor.execute("""
-                ALTER TABLE cv_candidates 
-                ALTER COLUMN source_file_id TYPE VARCHAR(500);
-            """)
-            conn.commit()
-            
-            # Verify the change
-            cursor.execute("""
-                SELECT character_maximum_length 
-                FROM information_schema.columns 
-                WHERE table_name = 'cv_candidates' 
-                AND column_name = 'source_file_id';
-            """)
-            new_length = cursor.fetchone()[0]
-            
-            print(f"✅ Column altered successfully!")
-            print(f"   Old length: {current_length}")
-            print(f"   New length: {new_length}")
-        else:
-            print("⚠️  Column 'source_file_id' not found!")
-        
-        cursor.close()
-        conn.close()
+        print(f"✅ source_file_id length: {result[0]}")
         print("✅ Database connection closed.")
         
     except Exception as e:
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
 from models import db
+from scripts.fix_postgres_direct import FIX_SOURCE_FILE_ID_SQL, SOURCE_FILE_ID_LENGTH_SQL
 
 def fix_column_sizes():
     """Fix column sizes for existing tables."""
@@ -29,70 +30,26 @@ def fix_column_sizes():
             
             print(f"Database type: {'PostgreSQL' if is_postgres else 'SQLite' if is_sqlite else 'Unknown'}")
             
-            # SQLite doesn't support ALTER COLUMN, just recreate tables
+            # SQLite doesn't enforce VARCHAR lengths, so there is nothing to fix
+            # (and no reason to drop the dev database)
             if is_sqlite:
-                print("⚠️  SQLite detected. Dropping and recreating tables...")
-                db.drop_all()
-                db.create_all()
-                print("✅ All tables recreated with correct schema!")
+                print("✅ SQLite detected. Column lengths aren't enforced; nothing to do.")
                 return
             
-            # For PostgreSQL, check and alter column if needed
+            # For PostgreSQL, check and alter in one round trip (shared with fix_postgres_direct)
             if is_postgres:
-                # Check if table exists
-                check_sql = """
-                SELECT EXISTS (
-                    SELECT 1 FROM information_schema.tables 
-                    WHERE table_name = 'cv_candidates'
-                );
-                """
-                result = db.session.execute(db.text(check_sql))
-                table_exists = result.scalar()
+                db.session.execute(db.text(FIX_SOURCE_FILE_ID_SQL))
+                db.session.commit()
                 
-                if not table_exists:
+                new_length = db.session.execute(db.text(SOURCE_FILE_ID_LENGTH_SQL)).scalar()
+                if new_length is None:
                     print("⚠️  Table 'cv_candidates' doesn't exist yet.")
                     print("Running db.create_all() first...")
                     db.create_all()
                     print("✅ Tables created!")
                     return
                 
-                # Check current column size
-                check_column_sql = """
-                SELECT column_name, character_maximum_length 
-                FROM information_schema.columns 
-                WHERE table_name = 'cv_candidates' 
-                AND column_name = 'source_file_id';
-                """
-                result = db.session.execute(db.text(check_column_sql))
-                row = result.fetchone()
-                
-                if row:
-                    current_length = row[1]
-                    print(f"Current source_file_id length: {current_length}")
-                    
-                    if current_length == 500:
-                        print("✅ Column is already the correct size (500)!")
-                        return
-                    
-                    # Alter the column
-                    print("Altering source_file_id column to VARCHAR(500)...")
-                    alter_sql = """
-                    ALTER TABLE cv_candidates 
-                    ALTER COLUMN source_file_id TYPE VARCHAR(500);
-                    """
-                    db.session.execute(db.text(alter_sql))
-                    db.session.commit()
-                    
-                    # Verify the change
-                    result = db.session.execute(db.text(check_column_sql))
-                    row = result.fetchone()
-                    new_length = row[1]
-                    
-                    print(f"✅ Column altered successfully! New length: {new_length}")
-                else:
-                    print("⚠️  Column 'source_file_id' not found. Creating table...")
-                    db.create_all()
-                    print("✅ Tables created!")
+                print(f"✅ source_file_id length: {new_length}")
             
         except Exception as e:
             print(f"❌ Error during column fix: {e}")
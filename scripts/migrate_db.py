@@ -8,23 +8,161 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy.schema import CreateTable
+
 from app import create_app
 from models import db
 
+
+def create_missing_tables():
+    """
+    CREATE TABLE IF NOT EXISTS for every model table, sent as one batch on PostgreSQL
+    instead of create_all()'s per-table existence checks.
+    """
+    statements = [
+        str(CreateTable(table, if_not_exists=True).compile(dialect=db.engine.dialect)).strip()
+        for table in db.metadata.sorted_tables
+    ]
+    connection = db.session.connection()
+    
+    if db.engine.dialect.name == 'postgresql':
+        connection.exec_driver_sql(';\n'.join(statements))
+    else:
+        # sqlite3 executes one statement per call
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    
+    db.session.commit()
+
+
+def add_missing_columns():
+    """Add model columns that are missing from existing tables (create_all skips them)."""
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = 0
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            print(f"Adding column {table.name}.{column.name} ({column_type})...")
+            db.session.execute(db.text(
+                f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+            ))
+            added += 1
+
+    db.session.commit()
+    return added
+
+
+def add_missing_indexes():
+    """Create model indexes that are missing from existing tables (create_all skips them)."""
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = 0
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing_indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            
+            print(f"Creating index {index.name} on {table.name}...")
+            index.create(bind=db.engine)
+            created += 1
+    
+    return created
+
+
+def add_missing_server_defaults():
+    """Set model server defaults (e.g. created_at = now()) on existing PostgreSQL columns."""
+    if db.engine.dialect.name != 'postgresql':
+        print("⚠️  Server defaults can't be added to existing SQLite columns; recreate the dev database if needed.")
+        return 0
+    
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    updated = 0
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing_defaults = {c['name']: c.get('default') for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.server_default is None or existing_defaults.get(column.name):
+                continue
+            
+            default_sql = column.server_default.arg.compile(dialect=db.engine.dialect)
+            print(f"Setting default for {table.name}.{column.name} ({default_sql})...")
+            db.session.execute(db.text(
+                f'ALTER TABLE {table.name} ALTER COLUMN {column.name} SET DEFAULT {default_sql}'
+            ))
+            updated += 1
+    
+    db.session.commit()
+    return updated
+
+
+def convert_json_columns():
+    """Convert legacy TEXT JSON list columns to JSONB (PostgreSQL only)."""
+    if db.engine.dialect.name != 'postgresql':
+        return 0
+    
+    inspector = db.inspect(db.engine)
+    converted = 0
+    
+    for table in db.metadata.sorted_tables:
+        json_columns = [c.name for c in table.columns if isinstance(c.type, db.JSON)]
+        if not json_columns:
+            continue
+        
+        existing_types = {c['name']: c['type'] for c in inspector.get_columns(table.name)}
+        for name in json_columns:
+            if not isinstance(existing_types.get(name), db.String):
+                continue  # Already JSON/JSONB (or missing)
+            
+            print(f"Converting {table.name}.{name} to JSONB...")
+            db.session.execute(db.text(
+                f"ALTER TABLE {table.name} ALTER COLUMN {name} TYPE jsonb "
+                f"USING NULLIF({name}, '')::jsonb"
+            ))
+            converted += 1
+    
+    db.session.commit()
+    return converted
+
+
 def migrate_database():
     """Create all missing tables and columns."""
     app = create_app()
-    
+
     with app.app_context():
         print("Starting database migration...")
-        
+
         try:
-            # Create all tables (this will only create missing ones)
-            db.create_all()
-            print("✅ Database migration completed successfully!")
+            # Create missing tables (indexes for new tables are added below)
+            create_missing_tables()
+
+            added = add_missing_columns()
+            add_missing_server_defaults()
+            converted = convert_json_columns()
+            indexed = add_missing_indexes()
+            print(f"✅ Database migration completed successfully! "
+                  f"({added} column(s) added, {converted} converted to JSONB, {indexed} index(es) created)")
             print("All ATS Agent tables have been created.")
-            
+
         except Exception as e:
+            db.session.rollback()
             print(f"❌ Error during migration: {e}")
             raise
 
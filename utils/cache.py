@@ -0,0 +1,63 @@
+"""
+Shared Redis Cache
+Small JSON cache helpers for values that are cheap to recompute but read on
+every page load. All helpers degrade to cache misses when Redis is unavailable.
+"""
+import logging
+import os
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+
+def get_redis_client():
+    """Get or create the Redis client (None if REDIS_URL is unset or Redis is missing)."""
+    global _redis_client
+    if _redis_client is None:
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+                _redis_client = redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis not available: {e}")
+                return None
+    return _redis_client
+
+
+def cache_get_json(key):
+    """Return the cached JSON value for key, or None on a miss."""
+    client = get_redis_client()
+    if not client:
+        return None
+    try:
+        raw = client.get(key)
+        return orjson.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"Redis get failed for {key}: {e}")
+        return None
+
+
+def cache_set_json(key, value, ttl):
+    """Store value as JSON under key for ttl seconds."""
+    client = get_redis_client()
+    if not client:
+        return
+    try:
+        client.setex(key, ttl, orjson.dumps(value))
+    except Exception as e:
+        logger.warning(f"Redis set failed for {key}: {e}")
+
+
+def cache_delete(*keys):
+    """Drop cached keys (used to invalidate after writes)."""
+    client = get_redis_client()
+    if not client or not keys:
+        return
+    try:
+        client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Redis delete failed for {keys}: {e}")
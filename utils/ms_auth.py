@@ -2,39 +2,327 @@
 Microsoft Authentication Utilities
 Handles automatic token refresh for Microsoft Graph API
 """
-from datetime import datetime, timedelta
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import msal
 import os
+import random
+import threading
+import time
 
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
 
-def get_msal_app(user_settings):
-    """Get MSAL application instance."""
-    client_id = user_settings.azure_client_id or os.getenv('AZURE_CLIENT_ID')
-    tenant_id = user_settings.azure_tenant_id or os.getenv('AZURE_TENANT_ID', 'common')
+from models import UserSettings, decrypt_value, encrypt_value
+from utils.cache import cache_get_json, cache_set_json, cache_delete
+
+logger = logging.getLogger(__name__)
+
+# App-wide Azure registration, used when a user hasn't set their own
+# (.env is loaded by the models import above)
+DEFAULT_CLIENT_ID = os.getenv('AZURE_CLIENT_ID')
+DEFAULT_TENANT_ID = os.getenv('AZURE_TENANT_ID', 'common')
+
+# Graph scopes requested at sign-in and on every refresh (must match)
+# Note: offline_access is automatically added by MSAL
+GRAPH_SCOPES = (
+    "User.Read",
+    "Mail.Read",
+    "Mail.ReadWrite",  # For reading email attachments
+    "OnlineMeetings.Read",
+    "OnlineMeetingTranscript.Read.All",
+    "Calendars.Read",
+    "Chat.Read",
+    "Mail.Send",
+    "Files.Read.All",  # For OneDrive/SharePoint CV access
+    "Sites.Read.All",  # For SharePoint access
+)
+
+# Tokens this close to expiry are treated as expired
+EXPIRY_BUFFER = timedelta(minutes=5)
+
+# Tokens closer than this to expiry (but still valid) are refreshed in the
+# background so request paths rarely wait on the token endpoint
+PREFETCH_WINDOW = timedelta(minutes=10)
+
+# Seconds before expiry that a Redis-cached token stops being served
+TOKEN_CACHE_BUFFER = int(EXPIRY_BUFFER.total_seconds())
+
+# Backoff after failed refreshes: 1s, 2s, 4s ... capped at this many seconds,
+# with +/-25% jitter so users don't retry in lockstep during an outage
+REFRESH_BACKOFF_MAX = 60
+
+# Expiry sweeps skip tokens that expired longer ago than this: their refresh
+# token is most likely revoked or lapsed, and retrying every sweep forever
+# only costs an Azure AD call and a warning each time. They still refresh on use.
+SWEEP_EXPIRED_GRACE = timedelta(hours=1)
+
+# Token columns written back after a refresh
+_TOKEN_COLUMNS = ('_ms_access_token', '_ms_refresh_token', 'ms_token_expires_at')
+
+
+# Shared keep-alive pool for login.microsoftonline.com, used by every MSAL app
+# so refreshes reuse open TLS connections instead of handshaking each time
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+
+class _DiscardingTokenCache(msal.TokenCache):
+    """
+    Token cache that keeps nothing. Tokens live encrypted in UserSettings, so the
+    long-lived shared apps must not collect every user's tokens in plaintext.
+    """
     
+    def add(self, event, *args, **kwargs):
+        pass
+
+
+@lru_cache(maxsize=128)
+def _build_msal_app(client_id, tenant_id):
+    """One MSAL app per (client, tenant) so authority discovery runs once."""
     return msal.PublicClientApplication(
         client_id,
-        authority=f"https://login.microsoftonline.com/{tenant_id}"
+        authority=f"https://login.microsoftonline.com/{tenant_id}",
+        http_client=_http_session,
+        token_cache=_DiscardingTokenCache()
     )
 
 
+def get_msal_app(user_settings=None):
+    """Get MSAL application instance (app-wide Azure registration if no user override)."""
+    client_id = DEFAULT_CLIENT_ID
+    tenant_id = DEFAULT_TENANT_ID
+    
+    if user_settings:
+        client_id = user_settings.azure_client_id or client_id
+        tenant_id = user_settings.azure_tenant_id or tenant_id
+    
+    return _build_msal_app(client_id, tenant_id)
+
+
 def is_token_expired(user_settings):
     """Check if the access token is expired or about to expire."""
-    if not user_settings.ms_token_expires_at:
+    expires_at = user_settings.ms_token_expires_at
+    if not expires_at:
         return True
     
     # Consider token expired if it expires in the next 5 minutes
-    expiry_buffer = datetime.utcnow() + timedelta(minutes=5)
-    return datetime.utcnow() >= user_settings.ms_token_expires_at or expiry_buffer >= user_settings.ms_token_expires_at
+    return datetime.utcnow() + EXPIRY_BUFFER >= expires_at
+
+
+def _expires_epoch(user_settings):
+    """Token expiry as a Unix timestamp (0 if unknown), memoized on the instance."""
+    expires_at = user_settings.ms_token_expires_at
+    cached = user_settings.__dict__.get('_expires_epoch')
+    if cached is None or cached[0] != expires_at:
+        epoch = expires_at.replace(tzinfo=timezone.utc).timestamp() if expires_at else 0.0
+        cached = (expires_at, epoch)
+        user_settings.__dict__['_expires_epoch'] = cached
+    return cached[1]
+
+
+# Per-user refresh locks: concurrent callers for the same user wait for the
+# in-flight refresh instead of each posting to the token endpoint
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _refresh_lock(user_id):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(user_id, threading.Lock())
+
+
+# Token writes staged by an in-progress refresh_many sweep, keyed by settings
+# row id; the sweep writes them in one UPDATE when its refreshes are done
+_pending_updates = {}
+_pending_lock = threading.Lock()
+
+
+def _write_token_updates(db, model, mappings):
+    """
+    Bulk UPDATE by primary key setting only the token columns, then commit.
+    No ORM flush or per-object events run. Rolls back and re-raises on failure.
+    """
+    try:
+        db.session.execute(db.update(model), mappings)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _flush_pending_updates(db, model, settings_ids):
+    """Write the sweep's staged token updates, retrying row by row if the batch fails."""
+    with _pending_lock:
+        mappings = [dict(_pending_updates[i]) for i in settings_ids if i in _pending_updates]
+    if not mappings:
+        return
+    
+    try:
+        _write_token_updates(db, model, mappings)
+    except Exception as e:
+        logger.error("Error writing %s refreshed token(s), retrying per row: %s", len(mappings), e)
+        for mapping in mappings:
+            try:
+                _write_token_updates(db, model, [mapping])
+            except Exception as e:
+                logger.error("Error writing refreshed token for settings %s: %s", mapping['id'], e)
+    finally:
+        # Unstage only after the write, so concurrent refreshers overlay the new tokens until then
+        with _pending_lock:
+            for mapping in mappings:
+                _pending_updates.pop(mapping['id'], None)
+
+
+def _apply_pending_update(user_settings):
+    """Overlay a not-yet-flushed token write onto a freshly loaded row."""
+    with _pending_lock:
+        mapping = _pending_updates.get(user_settings.id)
+    if mapping:
+        for column in _TOKEN_COLUMNS:
+            if column in mapping:
+                set_committed_value(user_settings, column, mapping[column])
+
+
+def _settings_id(user_settings):
+    """Primary key of the settings row, read without reloading an expired instance."""
+    identity = sa_inspect(user_settings).identity
+    return identity[0] if identity else None
+
+
+def _token_cache_key(settings_id):
+    return f"ms_token:{settings_id}"
+
+
+def _cache_get(user_settings):
+    """Cached (still encrypted) access token and its expiry epoch, or None."""
+    settings_id = _settings_id(user_settings)
+    return cache_get_json(_token_cache_key(settings_id)) if settings_id else None
+
+
+def _cache_put(user_settings):
+    """Cache the encrypted access token until TOKEN_CACHE_BUFFER before it expires."""
+    expires_ts = _expires_epoch(user_settings)
+    if not user_settings._ms_access_token or not expires_ts:
+        return
+    
+    ttl = int(expires_ts - time.time()) - TOKEN_CACHE_BUFFER
+    if ttl > 0:
+        cache_set_json(_token_cache_key(user_settings.id), {
+            'token': user_settings._ms_access_token,
+            'expires_at': expires_ts,
+        }, ttl)
+
+
+def forget_tokens(user_settings):
+    """Drop cached and not-yet-written tokens, e.g. after a disconnect or re-login."""
+    with _pending_lock:
+        _pending_updates.pop(user_settings.id, None)
+    cache_delete(_token_cache_key(user_settings.id))
 
 
 def refresh_access_token(user_settings, db):
     """
     Refresh the Microsoft access token using the refresh token.
+    Single-flight per user: callers that lose the race re-read the row and
+    reuse the winner's token instead of refreshing again.
     Returns True if successful, False otherwise.
     """
-    if not user_settings.ms_refresh_token:
-        print(f"No refresh token available for user {user_settings.user_id}")
+    with _refresh_lock(user_settings.user_id):
+        # Double-checked: another thread may have refreshed while we waited
+        db.session.refresh(user_settings)
+        _apply_pending_update(user_settings)
+        if user_settings.ms_access_token and not is_token_expired(user_settings):
+            return True
+        return _refresh_access_token(user_settings, db)
+
+
+def _should_prefetch(user_settings):
+    """True when the token is still valid but inside the prefetch window."""
+    expires_at = user_settings.ms_token_expires_at
+    return bool(expires_at) and datetime.utcnow() + PREFETCH_WINDOW >= expires_at
+
+
+# Background refreshes; user ids with a queued or running prefetch
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ms-token')
+_prefetching = set()
+
+
+def _refresh_in_context(app, db, model, settings_id, user_id, stage=False):
+    """
+    Refresh a soon-to-expire token in its own app context and session.
+    With stage=True the token write is left to the caller (see refresh_many).
+    Returns True if the row holds a token outside the prefetch window afterwards.
+    """
+    with app.app_context():
+        with _refresh_lock(user_id):
+            user_settings = db.session.get(model, settings_id)
+            if not user_settings:
+                return False
+            _apply_pending_update(user_settings)
+            # Another caller may have refreshed while this was queued
+            if not _should_prefetch(user_settings):
+                return True
+            return _refresh_access_token(user_settings, db, stage=stage)
+
+
+def _prefetch_access_token(app, db, model, settings_id, user_id):
+    try:
+        _refresh_in_context(app, db, model, settings_id, user_id)
+    finally:
+        with _refresh_locks_guard:
+            _prefetching.discard(user_id)
+
+
+def schedule_prefetch(user_settings, db):
+    """Queue a background refresh unless one is already pending for this user."""
+    user_id = user_settings.user_id
+    with _refresh_locks_guard:
+        if user_id in _prefetching:
+            return
+        _prefetching.add(user_id)
+    
+    _prefetch_pool.submit(
+        _prefetch_access_token, current_app._get_current_object(), db,
+        type(user_settings), user_settings.id, user_id
+    )
+
+
+# user_id -> (monotonic time before which refreshes are skipped, consecutive failures)
+_failure_state = {}
+
+
+def _record_refresh_failure(user_settings):
+    """Drop the cached token and push back this user's next refresh attempt."""
+    cache_delete(_token_cache_key(user_settings.id))
+    user_id = user_settings.user_id
+    with _refresh_locks_guard:
+        failures = _failure_state.get(user_id, (0.0, 0))[1]
+        delay = min(REFRESH_BACKOFF_MAX, 2 ** failures) * random.uniform(0.75, 1.25)
+        _failure_state[user_id] = (time.monotonic() + delay, failures + 1)
+
+
+def _refresh_access_token(user_settings, db, stage=False):
+    user_id = user_settings.user_id
+    settings_id = user_settings.id
+    backoff = _failure_state.get(user_id)
+    if backoff and time.monotonic() < backoff[0]:
+        logger.debug("Skipping token refresh for user %s during failure backoff", user_id)
+        return False
+    
+    refresh_token = user_settings.ms_refresh_token
+    if not refresh_token:
+        logger.warning("No refresh token available for user %s", user_id)
         return False
     
     try:
@@ -43,42 +331,44 @@ def refresh_access_token(user_settings, db):
         # Attempt to refresh the token - must use same scopes as initial auth
         # Note: offline_access is automatically handled by MSAL
         result = app_msal.acquire_token_by_refresh_token(
-            user_settings.ms_refresh_token,
-            scopes=[
-                "User.Read",
-                "Mail.Read",
-                "Mail.ReadWrite",
-                "OnlineMeetings.Read",
-                "OnlineMeetingTranscript.Read.All",
-                "Calendars.Read",
-                "Chat.Read",
-                "Mail.Send",
-                "Files.Read.All",
-                "Sites.Read.All"
-            ]
+            refresh_token,
+            scopes=GRAPH_SCOPES
         )
         
         if "access_token" in result:
-            # Update tokens in database
-            user_settings.ms_access_token = result['access_token']
+            values = {'_ms_access_token': encrypt_value(result['access_token'])}
             
-            if 'refresh_token' in result:
-                # Microsoft sometimes returns a new refresh token
-                user_settings.ms_refresh_token = result['refresh_token']
+            new_refresh_token = result.get('refresh_token')
+            if new_refresh_token and new_refresh_token != refresh_token:
+                # Microsoft sometimes rotates the refresh token; skip the write when it didn't
+                values['_ms_refresh_token'] = encrypt_value(new_refresh_token)
             
             if 'expires_in' in result:
-                user_settings.ms_token_expires_at = datetime.utcnow() + timedelta(seconds=result['expires_in'])
+                values['ms_token_expires_at'] = datetime.utcnow() + timedelta(seconds=result['expires_in'])
+            
+            if stage:
+                with _pending_lock:
+                    _pending_updates.setdefault(settings_id, {'id': settings_id}).update(values)
+            else:
+                _write_token_updates(db, type(user_settings), [{'id': settings_id, **values}])
             
-            db.session.commit()
-            print(f"Successfully refreshed access token for user {user_settings.user_id}")
+            # Loaded as already-persisted state so the caller's session never
+            # flushes the row again; the UPDATE above wrote just these columns
+            for column, value in values.items():
+                set_committed_value(user_settings, column, value)
+            _cache_put(user_settings)
+            _failure_state.pop(user_id, None)
+            logger.info("Refreshed access token for user %s", user_id)
             return True
         else:
             error = result.get('error_description', result.get('error', 'Unknown error'))
-            print(f"Failed to refresh token for user {user_settings.user_id}: {error}")
+            logger.warning("Failed to refresh token for user %s: %s", user_id, error)
+            _record_refresh_failure(user_settings)
             return False
             
     except Exception as e:
-        print(f"Error refreshing token for user {user_settings.user_id}: {e}")
+        logger.exception("Error refreshing token for user %s: %s", user_id, e)
+        _record_refresh_failure(user_settings)
         return False
 
 
@@ -87,16 +377,94 @@ def get_valid_access_token(user_settings, db):
     Get a valid access token, refreshing if necessary.
     Returns the access token or None if refresh failed.
     """
+    return get_valid_access_token_with_expiry(user_settings, db)[0]
+
+
+def get_valid_access_token_with_expiry(user_settings, db):
+    """
+    Like get_valid_access_token, but returns (access_token, expires_at_epoch) or
+    (None, None), so callers making several Graph calls can pin the token.
+    Tokens comfortably inside their lifetime are served from Redis, which
+    avoids reloading a settings row expired by an earlier commit.
+    """
+    cached = _cache_get(user_settings)
+    if cached and cached['expires_at'] - time.time() > PREFETCH_WINDOW.total_seconds():
+        return decrypt_value(cached['token']), cached['expires_at']
+    
+    # Fast path: a single float compare for a token well inside its lifetime
+    expires_epoch = _expires_epoch(user_settings)
+    if expires_epoch - time.time() > PREFETCH_WINDOW.total_seconds():
+        token = user_settings.ms_access_token
+        if not token:
+            return None, None
+        if not cached:
+            _cache_put(user_settings)
+        return token, expires_epoch
+    
     if not user_settings.ms_access_token:
-        return None
+        return None, None
     
     # Check if token is expired or about to expire
     if is_token_expired(user_settings):
-        print(f"Access token expired or expiring soon for user {user_settings.user_id}, attempting refresh...")
+        logger.debug("Access token expired or expiring soon for user %s, refreshing", user_settings.user_id)
         success = refresh_access_token(user_settings, db)
         
         if not success:
-            print(f"Failed to refresh token for user {user_settings.user_id}")
-            return None
+            logger.warning("No valid access token for user %s after refresh", user_settings.user_id)
+            return None, None
+    elif _should_prefetch(user_settings):
+        # Still valid: hand it back now and refresh off the request path
+        schedule_prefetch(user_settings, db)
+    
+    return user_settings.ms_access_token, _expires_epoch(user_settings) or None
+
+
+def find_users_expiring_soon(db, within_seconds=600):
+    """
+    Refreshable settings rows whose token expires within the window, or expired
+    less than SWEEP_EXPIRED_GRACE ago (a range scan on ix_user_settings_ms_expires).
+    Rows with no recorded expiry are left to refresh on use.
+    Only the columns refresh_many needs are loaded; other columns lazy-load on access.
+    """
+    now = datetime.utcnow()
+    cutoff = now + timedelta(seconds=within_seconds)
+    return db.session.scalars(
+        db.select(UserSettings)
+        .options(load_only(UserSettings.user_id, UserSettings._ms_refresh_token,
+                           UserSettings.ms_token_expires_at))
+        .where(
+            UserSettings._ms_refresh_token.isnot(None),
+            UserSettings.ms_token_expires_at > now - SWEEP_EXPIRED_GRACE,
+            UserSettings.ms_token_expires_at <= cutoff,
+        )
+    ).all()
+
+
+def refresh_many(user_settings_list, db, max_concurrency=8):
+    """
+    Refresh every token in the list that is expired or inside the prefetch window
+    (rows with no recorded expiry are skipped; they refresh on use),
+    up to max_concurrency at a time, then write all new tokens in one UPDATE.
+    Returns {user_id: success} for the rows that needed a refresh.
+    """
+    cutoff = time.time() + PREFETCH_WINDOW.total_seconds()
+    expiring = [
+        us for us in user_settings_list
+        if us._ms_refresh_token and 0 < _expires_epoch(us) <= cutoff
+    ]
+    if not expiring:
+        return {}
+    
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ms-token-sweep') as pool:
+        futures = {
+            us.user_id: pool.submit(_refresh_in_context, app, db, type(us), us.id, us.user_id, True)
+            for us in expiring
+        }
+        results = {user_id: future.result() for user_id, future in futures.items()}
     
-    return user_settings.ms_access_token
+    _flush_pending_updates(db, type(expiring[0]), [us.id for us in expiring])
+    # The caller's instances still hold the old tokens
+    for us in expiring:
+        db.session.expire(us, list(_TOKEN_COLUMNS))
+    return results
@@ -0,0 +1,114 @@
+"""
+Per-host Rate Limiting
+Paces outbound calls to Graph, ClickUp and OpenAI so concurrent agent work
+stays under provider limits instead of bursting into 429 retries.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Maximum number of times a 429 response is retried before it is returned
+MAX_429_RETRIES = 2
+
+# Fallback back-off (seconds) when a 429 carries no usable Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+
+class HostLimiter:
+    """
+    Token-bucket pacing plus a concurrency cap for a single API host.
+    Thread-safe: the agent services issue blocking HTTP calls from worker threads.
+    """
+
+    def __init__(self, qps, burst):
+        self.interval = 1.0 / qps
+        self._slots = threading.BoundedSemaphore(burst)
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def acquire(self):
+        """Take a concurrency slot and wait for the next pacing window."""
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed)
+            self._next_allowed = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self):
+        self._slots.release()
+
+    def backoff(self, seconds):
+        """Hold off all callers for this host for `seconds`."""
+        with self._lock:
+            self._next_allowed = max(self._next_allowed, time.monotonic() + seconds)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+# Shared session: keep-alive connection pool reused by every limited request
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20))
+
+
+LIMITERS = {
+    'graph.microsoft.com': HostLimiter(qps=10, burst=4),
+    'api.clickup.com': HostLimiter(qps=1.5, burst=4),  # 100 requests/min per token
+    'api.openai.com': HostLimiter(qps=5, burst=4),
+}
+
+_default_limiter = HostLimiter(qps=10, burst=8)
+
+
+def get_limiter(url_or_host):
+    """Return the limiter for a URL or bare hostname."""
+    host = urlsplit(url_or_host).hostname if '://' in url_or_host else url_or_host
+    return LIMITERS.get(host, _default_limiter)
+
+
+def _retry_after_seconds(resp, attempt):
+    """Seconds to wait after a 429, from Retry-After or ClickUp's reset header."""
+    retry_after = resp.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+    reset = resp.headers.get('X-RateLimit-Reset')
+    if reset:
+        try:
+            return max(0.0, float(reset) - time.time())
+        except ValueError:
+            pass
+
+    return DEFAULT_RETRY_AFTER * (2 ** attempt)
+
+
+def limited_request(method, url, **kwargs):
+    """
+    Session request paced by the host's limiter.
+    429 responses back off the whole host and are retried up to MAX_429_RETRIES times.
+    """
+    limiter = get_limiter(url)
+
+    for attempt in range(MAX_429_RETRIES + 1):
+        with limiter:
+            resp = _session.request(method, url, **kwargs)
+
+        if resp.status_code != 429 or attempt == MAX_429_RETRIES:
+            return resp
+
+        limiter.backoff(_retry_after_seconds(resp, attempt))
+
+    return resp